@@ -1,42 +1,72 @@
 from __future__ import annotations
+import asyncio
 import json
 from config.config import Config
 from client.response import ToolResultMessage
 from client.response import ToolCall
+from tools.base import ToolResult
 from agent.events import AgentEventType
 from client.response import StreamEventType
 from agent.events import AgentEvent
 from typing import AsyncGenerator
 from agent.session import Session
+from client.response import TokenUsage
+
+WRAP_UP_MESSAGE = (
+    "[Budget notice: {reason}. Stop here: don't start new work, and give "
+    "your final answer now with what you have found so far.]"
+)
 
 
 class Agent:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, session: Session | None = None):
         self.config = config
-        self.session: Session | None = Session(self.config)
+        self.session: Session | None = session or Session(self.config)
+        self._run_usage = TokenUsage()
 
     async def run(self, message: str):
         yield AgentEvent.agent_start(message)
+        self.session.refresh_memory(message)
         self.session.context_manager.add_user_message(message)
         final_response: str | None = None
+        self._run_usage = TokenUsage()
 
-        async for event in self._agentic_loop():
-            yield event
+        self.session.budget.start_run()
+        try:
+            async for event in self._agentic_loop():
+                yield event
 
-            if event.type == AgentEventType.TEXT_COMPLETE:
-                final_response = event.data.get("content")
+                if event.type == AgentEventType.TEXT_COMPLETE:
+                    final_response = event.data.get("content")
+        finally:
+            self.session.budget.end_run()
 
-        yield AgentEvent.agent_end(final_response)
+        yield AgentEvent.agent_end(final_response, usage=self._run_usage)
 
     async def _agentic_loop(self) -> AsyncGenerator[AgentEvent, None]:
         max_turns = self.config.max_turns
 
+        budget = self.session.budget
+
         for turn_num in range(max_turns):
+            exhausted = budget.exceeded()
+            if exhausted:
+                yield AgentEvent.agent_error(f"Budget exhausted: {exhausted}")
+                return
+
+            # Near a limit: ask for a final answer and offer no tools, so
+            # the turn ends with a response instead of more work
+            wrap_up = budget.near_limit()
+            if wrap_up:
+                self.session.context_manager.add_user_message(
+                    WRAP_UP_MESSAGE.format(reason=wrap_up)
+                )
+
             self.session.increment_turn()
 
             response_text = ""
 
-            tool_schemas = self.session.tool_registry.get_schemas()
+            tool_schemas = None if wrap_up else self.session.tool_registry.get_schemas()
 
             tool_calls: list[ToolCall] = []
 
@@ -53,6 +83,10 @@ class Agent:
                 elif event.type == StreamEventType.TOOL_CALL_COMPLETE:
                     if event.tool_call:
                         tool_calls.append(event.tool_call)
+                elif event.type == StreamEventType.MESSAGE_COMPLETE:
+                    if event.usage:
+                        budget.add(event.usage)
+                        self._run_usage = self._run_usage + event.usage
                 elif event.type == StreamEventType.ERROR:
                     yield AgentEvent.agent_error(
                         event.error or "Unknown error occurred",
@@ -90,11 +124,12 @@ class Agent:
                     tool_call.arguments,
                 )
 
-                result = await self.session.tool_registry.invoke(
-                    tool_call.name,
-                    tool_call.arguments,
-                    self.config.cwd,
-                )
+                result = None
+                async for event in self._invoke_tool(tool_call):
+                    if isinstance(event, AgentEvent):
+                        yield event
+                    else:
+                        result = event
 
                 yield AgentEvent.tool_call_complete(
                     tool_call.call_id,
@@ -118,6 +153,48 @@ class Agent:
 
         yield AgentEvent.agent_error(f"Maximum turns ({max_turns}) reached")
 
+    async def _invoke_tool(
+        self,
+        tool_call: ToolCall,
+    ) -> AsyncGenerator[AgentEvent | ToolResult, None]:
+        """Run a tool, yielding progress events while it runs and its result last."""
+        progress: asyncio.Queue[str] = asyncio.Queue()
+
+        task = asyncio.create_task(
+            self.session.tool_registry.invoke(
+                tool_call.name,
+                tool_call.arguments,
+                self.config.cwd,
+                on_progress=progress.put_nowait,
+            )
+        )
+
+        try:
+            while not task.done():
+                getter = asyncio.ensure_future(progress.get())
+                await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+
+                if getter.done():
+                    yield AgentEvent.tool_call_progress(
+                        tool_call.call_id, tool_call.name, getter.result()
+                    )
+                else:
+                    getter.cancel()
+
+            while not progress.empty():
+                yield AgentEvent.tool_call_progress(
+                    tool_call.call_id, tool_call.name, progress.get_nowait()
+                )
+
+            yield task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
     async def __aenter__(self) -> Agent:
         await self.session.initialize()
         return self
@@ -128,6 +205,6 @@ class Agent:
         exc_val,
         exc_tb,
     ) -> None:
-        if self.session and self.session.client:
-            await self.session.client.close()
+        if self.session:
+            await self.session.close()
             self.session = None
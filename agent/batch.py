@@ -0,0 +1,174 @@
+"""
+Batch mode: run many prompts from a JSONL file in one process.
+
+Each input line is `{"prompt": "...", "id": "...", "cwd": "..."}` (`id` and
+`cwd` optional). Prompts run on a pool of concurrent agents, each in a child
+of one root session, so they share the LLM connection pool and rate limit,
+the tools and their caches, and the MCP connections; config, imports and
+MCP startup are paid once. Every prompt gets its own conversation, working
+directory, shells and budget (the configured `[budget]` applies per prompt,
+including to the subagents it starts).
+
+Results are reported per prompt as they finish, in completion order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from agent.agent import Agent
+from agent.events import AgentEventType
+from agent.session import Session
+from config.config import BudgetConfig
+from config.config import Config
+
+
+@dataclass
+class BatchTask:
+    id: str
+    prompt: str
+    cwd: Path | None = None
+
+
+@dataclass
+class BatchResult:
+    id: str
+    prompt: str
+    cwd: str
+    status: str = "ok"
+    response: str | None = None
+    error: str | None = None
+    usage: dict[str, int] | None = None
+    tool_calls: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "prompt": self.prompt,
+            "cwd": self.cwd,
+            "status": self.status,
+            "response": self.response,
+            "error": self.error,
+            "usage": self.usage,
+            "tool_calls": self.tool_calls,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def load_batch_tasks(path: Path, default_cwd: Path) -> list[BatchTask]:
+    """Parse a JSONL batch file; raises ValueError naming the bad line."""
+    tasks: list[BatchTask] = []
+
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from e
+
+            if not isinstance(data, dict) or not isinstance(data.get("prompt"), str):
+                raise ValueError(
+                    f"{path}:{line_number}: expected an object with a 'prompt'"
+                )
+
+            cwd = data.get("cwd")
+            tasks.append(
+                BatchTask(
+                    id=str(data.get("id", line_number)),
+                    prompt=data["prompt"],
+                    # Relative paths are relative to the batch's working directory
+                    cwd=(default_cwd / cwd).resolve() if cwd else None,
+                )
+            )
+
+    return tasks
+
+
+class BatchRunner:
+    def __init__(self, config: Config, concurrency: int = 4) -> None:
+        self.config = config
+        self.concurrency = max(1, concurrency)
+
+    async def run(
+        self,
+        tasks: list[BatchTask],
+        on_result: Callable[[BatchResult], None] | None = None,
+    ) -> list[BatchResult]:
+        queue: asyncio.Queue[BatchTask] = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        results: list[BatchResult] = []
+
+        # The root session only holds the shared resources; budgets are per
+        # prompt, so it has none of its own. Every prompt's requests go
+        # through its rate limiter, which must let `concurrency` prompts
+        # make a request at once.
+        root = Session(
+            self.config.model_copy(
+                update={
+                    "budget": BudgetConfig(),
+                    "llm_max_concurrent_requests": max(
+                        self.config.llm_max_concurrent_requests,
+                        self.concurrency,
+                    ),
+                }
+            )
+        )
+        await root.initialize()
+
+        async def worker() -> None:
+            while not queue.empty():
+                task = queue.get_nowait()
+                result = await self._run_task(root, task)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+        try:
+            workers = min(self.concurrency, len(tasks))
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            await root.close()
+
+        return results
+
+    async def _run_task(self, root: Session, task: BatchTask) -> BatchResult:
+        cwd = task.cwd or self.config.cwd
+        result = BatchResult(id=task.id, prompt=task.prompt, cwd=str(cwd))
+        start = time.monotonic()
+
+        if not cwd.is_dir():
+            result.status = "error"
+            result.error = f"Working directory does not exist: {cwd}"
+            return result
+
+        config = self.config.model_copy(update={"cwd": cwd})
+
+        try:
+            async with Agent(config, session=root.create_child(config)) as agent:
+                async for event in agent.run(task.prompt):
+                    if event.type == AgentEventType.TOOL_CALL_START:
+                        result.tool_calls.append(event.data.get("name"))
+                    elif event.type == AgentEventType.AGENT_ERROR:
+                        result.status = "error"
+                        result.error = event.data.get("error", "Unknown error")
+                    elif event.type == AgentEventType.AGENT_END:
+                        result.response = event.data.get("response")
+                        result.usage = event.data.get("usage")
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e) or type(e).__name__
+
+        result.elapsed = time.monotonic() - start
+        return result
@@ -0,0 +1,96 @@
+"""
+Token and wall-clock budgets for sessions.
+
+Each session has a tracker fed with the `TokenUsage` reported at the end of
+every LLM response. A subagent's tracker also charges its parent's, so the
+parent's limits cover everything done on its behalf, and a subagent stops
+when either its own or any ancestor's budget is spent.
+"""
+
+from __future__ import annotations
+
+import time
+from client.response import TokenUsage
+from config.config import BudgetConfig
+
+
+class BudgetTracker:
+    def __init__(
+        self,
+        config: BudgetConfig,
+        parent: BudgetTracker | None = None,
+    ) -> None:
+        self.config = config
+        self.parent = parent
+        self.usage = TokenUsage()
+        # Usage of the latest response, as an estimate for the next one
+        self._last_usage = TokenUsage()
+        self._elapsed = 0.0
+        self._run_started: float | None = None
+        self._runs = 0
+
+    @property
+    def elapsed(self) -> float:
+        if self._run_started is None:
+            return self._elapsed
+        return self._elapsed + time.monotonic() - self._run_started
+
+    def start_run(self) -> None:
+        self._runs += 1
+        if self._run_started is None:
+            self._run_started = time.monotonic()
+        if self.parent is not None:
+            self.parent.start_run()
+
+    def end_run(self) -> None:
+        self._runs -= 1
+        if self._runs == 0 and self._run_started is not None:
+            self._elapsed += time.monotonic() - self._run_started
+            self._run_started = None
+        if self.parent is not None:
+            self.parent.end_run()
+
+    def add(self, usage: TokenUsage) -> None:
+        self.usage = self.usage + usage
+        self._last_usage = usage
+        if self.parent is not None:
+            self.parent.add(usage)
+
+    def exceeded(self) -> str | None:
+        """Why no more requests should be made, if a limit has been reached."""
+        return self._check(1.0, projected=False)
+
+    def near_limit(self) -> str | None:
+        """Why the agent should wrap up, if the next request could pass
+        `wrap_up_at` of a limit."""
+        return self._check(self.config.wrap_up_at, projected=True)
+
+    def _check(self, fraction: float, projected: bool) -> str | None:
+        config = self.config
+        # With `projected`, count the next request as costing what the last did
+        ahead = self._last_usage if projected else TokenUsage()
+
+        limits = (
+            (
+                "prompt tokens",
+                self.usage.prompt_tokens,
+                ahead.prompt_tokens,
+                config.max_prompt_tokens,
+            ),
+            (
+                "completion tokens",
+                self.usage.completion_tokens,
+                ahead.completion_tokens,
+                config.max_completion_tokens,
+            ),
+            ("seconds", self.elapsed, 0, config.max_wall_clock_sec),
+        )
+
+        for name, used, next_cost, limit in limits:
+            if limit is not None and used + next_cost >= limit * fraction:
+                return f"{used:,.0f} of {limit:,.0f} {name} used"
+
+        if self.parent is not None:
+            return self.parent._check(fraction, projected)
+
+        return None
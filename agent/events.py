@@ -19,6 +19,7 @@ class AgentEventType(str, Enum):
 
     # tool calls
     TOOL_CALL_START = "tool_call_start"
+    TOOL_CALL_PROGRESS = "tool_call_progress"
     TOOL_CALL_COMPLETE = "tool_call_complete"
 
 
@@ -89,6 +90,22 @@ class AgentEvent:
             },
         )
 
+    @classmethod
+    def tool_call_progress(
+        cls,
+        call_id: str,
+        name: str,
+        content: str,
+    ) -> AgentEvent:
+        return cls(
+            type=AgentEventType.TOOL_CALL_PROGRESS,
+            data={
+                "call_id": call_id,
+                "name": name,
+                "content": content,
+            },
+        )
+
     @classmethod
     def tool_call_complete(
         cls,
@@ -0,0 +1,223 @@
+"""
+Append-only session logs, so a conversation survives the process.
+
+Each session writes `<data dir>/sessions/<session_id>.jsonl`: a header
+record, then one record per message added to its context (user, assistant
+with tool calls, tool result) as it is added. Nothing is ever rewritten, so
+saving costs one small append per message. Records carry the message's
+token count, so resuming rebuilds the context without re-tokenizing.
+
+A process killed mid-turn can leave an assistant message whose tool calls
+have no results, or a half-written line; loading skips both, since the API
+rejects tool calls without results.
+
+Logs hold full tool outputs (file contents, command output, possibly
+secrets), so they are readable by their owner only, and starting a new log
+deletes the oldest ones beyond `max_saved_sessions`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from typing import TextIO
+from config.loader import get_data_dir
+from context.manager import MessageItem
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DIR_NAME = "sessions"
+
+
+def get_sessions_dir() -> Path:
+    return get_data_dir() / SESSIONS_DIR_NAME
+
+
+class SessionLog:
+    def __init__(
+        self,
+        path: Path,
+        header: dict[str, Any],
+        max_sessions: int | None = None,
+    ) -> None:
+        self.path = path
+        self._header = header
+        # Logs kept in the directory once this one is created
+        self._max_sessions = max_sessions
+        self._file: TextIO | None = None
+
+    def append(self, item: MessageItem) -> None:
+        record = {
+            "type": "message",
+            "role": item.role,
+            "content": item.content,
+            "token_count": item.token_count,
+        }
+        if item.tool_call_id:
+            record["tool_call_id"] = item.tool_call_id
+        if item.tool_calls:
+            record["tool_calls"] = item.tool_calls
+
+        self._write(record)
+
+    def _write(self, record: dict[str, Any]) -> None:
+        try:
+            if self._file is None:
+                # Opened on the first message, so sessions that never get one
+                # (e.g. the root of a batch run) leave no file behind
+                is_new = not self.path.exists()
+                self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                fd = os.open(
+                    self.path,
+                    os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                    0o600,
+                )
+                self._file = os.fdopen(fd, "a", encoding="utf-8")
+                if is_new:
+                    self._file.write(json.dumps(self._header) + "\n")
+                    if self._max_sessions is not None:
+                        prune_sessions(self.path.parent, self._max_sessions)
+                elif not _ends_with_newline(self.path):
+                    # Don't glue our first record onto a torn one
+                    self._file.write("\n")
+
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"Failed to write session log {self.path}: {e}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+def load_session(path: Path) -> tuple[dict[str, Any], list[MessageItem]]:
+    """Read a session log; returns its header and the completed messages."""
+    header: dict[str, Any] = {}
+    items: list[MessageItem] = []
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn write from a process that was killed
+                continue
+
+            if record.get("type") == "session":
+                header = record
+            elif record.get("type") == "message":
+                items.append(
+                    MessageItem(
+                        role=record["role"],
+                        content=record.get("content") or "",
+                        tool_call_id=record.get("tool_call_id"),
+                        tool_calls=record.get("tool_calls") or [],
+                        token_count=record.get("token_count"),
+                    )
+                )
+
+    return header, _drop_unfinished_turns(items)
+
+
+def _drop_unfinished_turns(items: list[MessageItem]) -> list[MessageItem]:
+    """Remove assistant messages missing some of their tool results, along
+    with the results they did get."""
+    kept: list[MessageItem] = []
+    index = 0
+
+    while index < len(items):
+        item = items[index]
+        index += 1
+
+        if item.role != "assistant" or not item.tool_calls:
+            kept.append(item)
+            continue
+
+        results = []
+        while index < len(items) and items[index].role == "tool":
+            results.append(items[index])
+            index += 1
+
+        answered = {result.tool_call_id for result in results}
+        if all(call["id"] in answered for call in item.tool_calls):
+            kept.append(item)
+            kept.extend(results)
+
+    return kept
+
+
+def prune_sessions(sessions_dir: Path, keep: int) -> None:
+    """Delete all but the `keep` most recently updated logs."""
+    paths = sorted(
+        sessions_dir.glob("*.jsonl"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in paths[keep:]:
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.warning(f"Failed to delete old session log {path}: {e}")
+
+
+def find_session(session_id: str) -> Path:
+    """Log for `session_id`, which may be any unique prefix of it."""
+    sessions_dir = get_sessions_dir()
+    matches = sorted(
+        path
+        for path in sessions_dir.glob("*.jsonl")
+        if session_id and path.name.startswith(session_id)
+    )
+
+    if not matches:
+        raise ValueError(f"No saved session matches '{session_id}'")
+    if len(matches) > 1:
+        raise ValueError(
+            f"'{session_id}' matches {len(matches)} saved sessions; "
+            f"give more of the ID"
+        )
+
+    return matches[0]
+
+
+def list_sessions(limit: int = 20) -> list[dict[str, Any]]:
+    """Headers of the most recently updated saved sessions."""
+    sessions_dir = get_sessions_dir()
+    if not sessions_dir.is_dir():
+        return []
+
+    paths = sorted(
+        sessions_dir.glob("*.jsonl"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+
+    sessions = []
+    for path in paths[:limit]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            continue
+
+        header["updated_at"] = datetime.fromtimestamp(path.stat().st_mtime).isoformat(
+            timespec="seconds"
+        )
+        sessions.append(header)
+
+    return sessions
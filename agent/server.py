@@ -0,0 +1,475 @@
+"""
+Long-running agent server for editor integrations.
+
+Serves JSON-RPC 2.0 over a Unix socket (or localhost TCP), one JSON message
+per line. The socket is only accessible to the user running the server. Any
+local user can reach a TCP port, so in TCP mode the server writes a random
+token to a file only that user can read (`default_token_path()`), and a
+connection must send `server.auth` with it before any other request. The server keeps one warm root session (tools, tokenizer, LLM
+connection pool, connected MCP servers) and hosts any number of client
+sessions as its children, so opening a session and running a prompt costs
+no startup.
+
+Methods:
+  server.auth     {token}                 -> {authenticated}   (TCP only)
+  session.create  {cwd?, allowed_tools?}  -> {session_id}
+  session.run     {session_id, prompt}    -> {response, usage, cancelled}
+      While running, `event` notifications stream the session's
+      AgentEvents: {session_id, request_id, type, data}.
+  session.cancel  {session_id}            -> {cancelled}
+  session.close   {session_id}            -> {closed}
+  session.list    {}                      -> {sessions: [...]}
+  server.status   {}                      -> {sessions, mcp_servers, llm, uptime}
+
+A session runs one prompt at a time; sessions run concurrently. Runs a
+client started are cancelled if it disconnects; its sessions stay open
+for a reconnect until closed.
+
+All sessions and their subagents share the root's LLM rate limiter:
+at most `llm_max_concurrent_requests` requests (default 4) are in flight
+at once, and `llm_requests_per_minute` applies across the server. Raise
+them in the config for many concurrent sessions; `server.status` reports
+the limits and how many requests are active and waiting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import aclosing
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from agent.agent import Agent
+from agent.events import AgentEventType
+from agent.session import Session
+from config.config import BudgetConfig
+from config.config import Config
+from config.loader import get_data_dir
+from utils.text import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+UNAUTHORIZED = -32001
+
+# Longest request line accepted; prompts may carry whole files
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@dataclass
+class ServerSession:
+    id: str
+    agent: Agent
+    created_at: float
+    run_task: asyncio.Task | None = None
+    runs: int = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.run_task is not None and not self.run_task.done()
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self._lock = asyncio.Lock()
+        self.tasks: set[asyncio.Task] = set()
+        self.authenticated = False
+
+    async def send(self, message: dict[str, Any]) -> None:
+        line = json.dumps(message, ensure_ascii=False, default=str) + "\n"
+        async with self._lock:
+            if self.writer.is_closing():
+                return
+            self.writer.write(line.encode("utf-8"))
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+
+class AgentServer:
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.root: Session | None = None
+        self.sessions: dict[str, ServerSession] = {}
+        # Required from TCP clients, see `serve_tcp`
+        self.token: str | None = None
+        self._started_at = time.monotonic()
+        self._methods = {
+            "session.create": self._session_create,
+            "session.run": self._session_run,
+            "session.cancel": self._session_cancel,
+            "session.close": self._session_close,
+            "session.list": self._session_list,
+            "server.status": self._server_status,
+            "server.auth": self._server_auth,
+        }
+
+    async def start(self) -> None:
+        # Budgets apply per client session; the root only holds the shared
+        # resources
+        self.root = Session(self.config.model_copy(update={"budget": BudgetConfig()}))
+        await self.root.initialize()
+        # Load the tokenizer now rather than on the first client's prompt
+        await asyncio.to_thread(get_tokenizer, self.config.model_name)
+
+    async def close(self) -> None:
+        for session_id in list(self.sessions):
+            await self._close_session(session_id)
+
+        if self.root is not None:
+            await self.root.close()
+            self.root = None
+
+    async def serve_unix(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(
+            self._handle_client, path=str(path), limit=MAX_MESSAGE_BYTES
+        )
+        path.chmod(0o600)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def serve_tcp(self, host: str, port: int, token_path: Path) -> None:
+        """Serve on a TCP port, writing the token clients must send with
+        `server.auth` to `token_path` (readable by this user only)."""
+        self.token = secrets.token_urlsafe(32)
+        token_path.parent.mkdir(parents=True, exist_ok=True)
+        token_path.unlink(missing_ok=True)
+        fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+
+        try:
+            server = await asyncio.start_server(
+                self._handle_client, host, port, limit=MAX_MESSAGE_BYTES
+            )
+            async with server:
+                await server.serve_forever()
+        finally:
+            token_path.unlink(missing_ok=True)
+
+    async def _handle_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        connection = _Connection(writer)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # End of stream; the last message may lack its newline
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    await _discard_line(reader)
+                    await connection.send(
+                        _error(
+                            None,
+                            INVALID_REQUEST,
+                            f"Message exceeds {MAX_MESSAGE_BYTES} bytes",
+                        )
+                    )
+                    continue
+
+                if line.strip():
+                    # Requests run concurrently, so one long `session.run`
+                    # doesn't hold up a `session.cancel` behind it
+                    task = asyncio.create_task(self._handle_line(connection, line))
+                    connection.tasks.add(task)
+                    task.add_done_callback(connection.tasks.discard)
+
+                if not line.endswith(b"\n"):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in list(connection.tasks):
+                task.cancel()
+            await asyncio.gather(*connection.tasks, return_exceptions=True)
+            writer.close()
+
+    async def _handle_line(self, connection: _Connection, line: bytes) -> None:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            await connection.send(_error(None, PARSE_ERROR, f"Parse error: {e}"))
+            return
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            await connection.send(
+                _error(None, INVALID_REQUEST, "Expected a JSON-RPC request object")
+            )
+            return
+
+        request_id = request.get("id")
+        params = request.get("params") or {}
+        method = self._methods.get(request["method"])
+
+        try:
+            if (
+                self.token is not None
+                and not connection.authenticated
+                and request["method"] != "server.auth"
+            ):
+                raise RPCError(UNAUTHORIZED, "Authenticate with `server.auth` first")
+            if method is None:
+                raise RPCError(
+                    METHOD_NOT_FOUND, f"Method not found: {request['method']}"
+                )
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "`params` must be an object")
+
+            result = await method(connection, request_id, params)
+        except RPCError as e:
+            response = _error(request_id, e.code, e.message)
+        except Exception as e:
+            logger.exception(f"Error handling {request['method']}")
+            response = _error(request_id, SERVER_ERROR, str(e) or type(e).__name__)
+        else:
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+        # Requests without an id are notifications and get no response
+        if request_id is not None:
+            await connection.send(response)
+
+    def _get_session(self, params: dict[str, Any]) -> ServerSession:
+        session = self.sessions.get(params.get("session_id"))
+        if session is None:
+            raise RPCError(
+                INVALID_PARAMS, f"Unknown session: {params.get('session_id')}"
+            )
+        return session
+
+    async def _session_create(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        overrides: dict[str, Any] = {}
+
+        if params.get("cwd"):
+            cwd = Path(params["cwd"]).expanduser()
+            if not cwd.is_dir():
+                raise RPCError(
+                    INVALID_PARAMS, f"Working directory does not exist: {cwd}"
+                )
+            overrides["cwd"] = cwd.resolve()
+
+        if params.get("allowed_tools") is not None:
+            overrides["allowed_tools"] = list(params["allowed_tools"])
+
+        config = self.config.model_copy(update=overrides)
+        agent = Agent(config, session=self.root.create_child(config))
+        await agent.__aenter__()
+
+        session = ServerSession(
+            id=agent.session.session_id,
+            agent=agent,
+            created_at=time.time(),
+        )
+        self.sessions[session.id] = session
+        return {"session_id": session.id, "cwd": str(config.cwd)}
+
+    async def _session_run(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        session = self._get_session(params)
+        prompt = params.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise RPCError(INVALID_PARAMS, "`prompt` must be a non-empty string")
+        if session.busy:
+            raise RPCError(SERVER_ERROR, f"Session {session.id} is already running")
+
+        session.run_task = asyncio.create_task(
+            self._run_prompt(connection, request_id, session, prompt)
+        )
+        session.runs += 1
+
+        try:
+            return await asyncio.shield(session.run_task)
+        except asyncio.CancelledError:
+            # The client went away; don't leave its run going
+            session.run_task.cancel()
+            raise
+
+    async def _run_prompt(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        session: ServerSession,
+        prompt: str,
+    ) -> dict[str, Any]:
+        result: dict[str, Any] = {"response": None, "usage": None, "cancelled": False}
+
+        try:
+            async with aclosing(session.agent.run(prompt)) as events:
+                async for event in events:
+                    await connection.send(
+                        {
+                            "jsonrpc": "2.0",
+                            "method": "event",
+                            "params": {
+                                "session_id": session.id,
+                                "request_id": request_id,
+                                "type": event.type.value,
+                                "data": event.data,
+                            },
+                        }
+                    )
+                    if event.type == AgentEventType.AGENT_ERROR:
+                        result["error"] = event.data.get("error")
+                    elif event.type == AgentEventType.AGENT_END:
+                        result["response"] = event.data.get("response")
+                        result["usage"] = event.data.get("usage")
+        except asyncio.CancelledError:
+            result["cancelled"] = True
+
+        return result
+
+    async def _session_cancel(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        session = self._get_session(params)
+        if not session.busy:
+            return {"cancelled": False}
+
+        session.run_task.cancel()
+        await asyncio.gather(session.run_task, return_exceptions=True)
+        return {"cancelled": True}
+
+    async def _session_close(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        session = self._get_session(params)
+        await self._close_session(session.id)
+        return {"closed": True}
+
+    async def _close_session(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+
+        if session.busy:
+            session.run_task.cancel()
+            await asyncio.gather(session.run_task, return_exceptions=True)
+
+        await session.agent.__aexit__(None, None, None)
+
+    async def _session_list(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "sessions": [
+                {
+                    "session_id": session.id,
+                    "cwd": str(session.agent.config.cwd),
+                    "created_at": session.created_at,
+                    "runs": session.runs,
+                    "busy": session.busy,
+                    "usage": asdict(session.agent.session.budget.usage),
+                }
+                for session in self.sessions.values()
+            ]
+        }
+
+    async def _server_auth(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        token = params.get("token")
+        if self.token is not None:
+            if not isinstance(token, str) or not hmac.compare_digest(token, self.token):
+                raise RPCError(UNAUTHORIZED, "Invalid token")
+        connection.authenticated = True
+        return {"authenticated": True}
+
+    async def _server_status(
+        self,
+        connection: _Connection,
+        request_id: Any,
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        limiter = self.root.client.rate_limiter
+        return {
+            "sessions": len(self.sessions),
+            "busy": sum(1 for session in self.sessions.values() if session.busy),
+            "uptime": time.monotonic() - self._started_at,
+            "mcp_servers": {
+                client.name: client.status.value
+                for client in self.root.mcp_manager.clients
+            },
+            "llm": {
+                "max_concurrent_requests": limiter.max_concurrent,
+                "requests_per_minute": limiter.requests_per_minute,
+                "active": limiter.active,
+                "waiting": limiter.waiting,
+            },
+        }
+
+
+async def _discard_line(reader: asyncio.StreamReader) -> None:
+    """Skip the rest of a line longer than the reader's limit."""
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+
+
+def _error(request_id: Any, code: int, message: str) -> dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def default_socket_path() -> Path:
+    return get_data_dir() / "ite.sock"
+
+
+def default_token_path() -> Path:
+    return get_data_dir() / "server.token"
@@ -1,64 +1,200 @@
+from __future__ import annotations
 from tools.mcp.mcp_manager import MCPManager
 from tools.discovery import ToolDiscoveryManager
-import json
-from config.loader import get_data_dir
+from context.memory import get_memory_store
 from datetime import datetime
 import uuid
 from tools.registry import create_default_registry
 from context.manager import ContextManager
+from context.manager import MessageItem
 from client.llm_client import LLMClient
 from config.config import Config
+from agent.budget import BudgetTracker
+from agent.persistence import SessionLog
+from agent.persistence import find_session
+from agent.persistence import get_sessions_dir
+from agent.persistence import load_session
+from tools.base import Tool
+from tools.builtin.shell import ShellTool
+from tools.builtin.shell_job import ShellJobTool
+from tools.builtin.todo import TodosTool
+from tools.builtin.shell_jobs import ShellJobManager
+from tools.subagent import ParallelSubagentTool
+from tools.subagent import SubagentTool
+from utils.preload import preload_in_background
 
 
 class Session:
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        parent: Session | None = None,
+        resume_id: str | None = None,
+    ):
+        """`resume_id` (or a unique prefix of it) continues a saved session;
+        raises ValueError if there is no such session."""
         self.config = config
-        self.client = LLMClient(config=self.config)
-        self.tool_registry = create_default_registry(config)
+        self.parent = parent
         self.context_manager: ContextManager | None = None
-        self.discovery_manager = ToolDiscoveryManager(
-            self.config,
-            self.tool_registry,
+
+        if parent is not None:
+            # A subagent's (or batch/server prompt's) session: everything
+            # except the conversation and the stateful tools is borrowed
+            # from the parent (see `create_child`)
+            self.client = parent.client
+            self.tool_registry = parent.tool_registry.view(config)
+            self.shell_jobs = ShellJobManager()
+            self._own_tools: list[Tool] = [
+                ShellTool(config),
+                ShellJobTool(config, self.shell_jobs),
+                TodosTool(config),
+            ]
+            # Subagents started from here run in this session's cwd and
+            # charge its budget
+            for tool in self.tool_registry.get_tools():
+                if isinstance(tool, (SubagentTool, ParallelSubagentTool)):
+                    self._own_tools.append(tool.for_session(self))
+            for tool in self._own_tools:
+                self.tool_registry.register(tool, replace=True)
+            self.discovery_manager = parent.discovery_manager
+            self.mcp_manager = parent.mcp_manager
+        else:
+            preload_in_background(config.model_name)
+            self.client = LLMClient(config=self.config)
+            self.tool_registry = create_default_registry(config)
+            # Background shell jobs live as long as the session
+            self.shell_jobs = ShellJobManager()
+            self.tool_registry.register(ShellJobTool(config, self.shell_jobs))
+            self.discovery_manager = ToolDiscoveryManager(
+                self.config,
+                self.tool_registry,
+            )
+            self.mcp_manager = MCPManager(self.config)
+            for tool in self.tool_registry.get_tools():
+                if isinstance(tool, (SubagentTool, ParallelSubagentTool)):
+                    tool.parent_session = self
+
+        # Charges the parent's budget as well, see agent/budget.py
+        self.budget = BudgetTracker(
+            config.budget,
+            parent=parent.budget if parent is not None else None,
         )
-        self.mcp_manager = MCPManager(self.config)
+
         self.session_id = str(uuid.uuid4())
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
 
+        self._restored: list[MessageItem] = []
+        if resume_id is not None:
+            header, self._restored = load_session(find_session(resume_id))
+            self.session_id = header.get("session_id", self.session_id)
+            if "created_at" in header:
+                self.created_at = datetime.fromisoformat(header["created_at"])
+
+        # Subagents' conversations are part of the parent's tool results
+        self.log: SessionLog | None = None
+        if parent is None and config.persist_sessions:
+            self.log = SessionLog(
+                get_sessions_dir() / f"{self.session_id}.jsonl",
+                header={
+                    "type": "session",
+                    "session_id": self.session_id,
+                    "created_at": self.created_at.isoformat(),
+                    "cwd": str(config.cwd),
+                    "model": config.model_name,
+                },
+                max_sessions=config.max_saved_sessions,
+            )
+
         self._turn_count = 0
 
+    def create_child(self, config: Config) -> Session:
+        """Session for a subagent (or a batch prompt or server session).
+
+        The child shares this session's LLM client (connection pool and rate
+        limit), MCP connections, and the tools that are stateless or only
+        hold caches (file tools, grep, web fetch and search, memory). It
+        gets its own conversation and its own instance of every tool that
+        holds per-session state, which must never be shared:
+
+        - `shell` (persistent shells: cwd, variables, running commands)
+        - `shell_job` (background jobs)
+        - `todos` (the task list)
+        - the subagent tools, rebound to the child so nested subagents
+          inherit its config and budget
+
+        A new stateful tool must be added to that list in `__init__`.
+        Tools are filtered by the child's `allowed_tools`. Closing the child
+        closes its own tools and leaves the shared resources alone.
+        """
+        return Session(config, parent=self)
+
     async def initialize(self) -> None:
-        await self.mcp_manager.initialize()
-        self.mcp_manager.register_tools(self.tool_registry)
-        self.discovery_manager.discover_all()
+        if self.parent is None:
+            await self.mcp_manager.initialize()
+            self.mcp_manager.register_tools(self.tool_registry)
+            self.discovery_manager.discover_all()
+
         self.context_manager = ContextManager(
             config=self.config,
             user_memory=self._load_memory(),
             tools=self.tool_registry.get_tools(),
+            on_message=self.log.append if self.log is not None else None,
         )
+        if self._restored:
+            self.context_manager.restore(self._restored)
 
-    def _load_memory(self) -> str | None:
-        data_dir = get_data_dir()
-        data_dir.mkdir(parents=True, exist_ok=True)
-        path = data_dir / "user_memory.json"
+    @property
+    def resumed_messages(self) -> int:
+        return len(self._restored)
 
-        if not path.exists():
-            return None
+    async def close(self) -> None:
+        if self.parent is not None:
+            await self.shell_jobs.close()
+            for tool in self._own_tools:
+                await tool.close()
+            return
+
+        if self.log is not None:
+            self.log.close()
+
+        await self.shell_jobs.close()
+        await self.tool_registry.close()
+        await self.mcp_manager.shutdown()
+        await self.client.close()
+        get_memory_store().flush()
 
-        try:
-            content = path.read_text(encoding="utf-8")
-            data = json.loads(content)
-            entries = data.get("entries")
-            if not entries:
-                return None
-
-            lines = ["User preferences and notes:"]
-            for key, value in entries.items():
-                lines.append(f"- {key}: {value}")
-            return "\n".join(lines)
-        except Exception:
+    def refresh_memory(self, message: str) -> None:
+        """Swap the memories in the system prompt for those relevant to `message`."""
+        if self.context_manager:
+            self.context_manager.set_user_memory(self._load_memory(message))
+
+    def _load_memory(self, query: str | None = None) -> str | None:
+        store = get_memory_store()
+        entries = store.entries()
+        if not entries:
             return None
 
+        top_k = self.config.memory_top_k
+        if len(entries) <= top_k:
+            selected = list(entries.items())
+        elif query:
+            selected = [(key, value) for key, value, _ in store.search(query, top_k)]
+        else:
+            selected = []
+
+        lines = ["User preferences and notes:"]
+        for key, value in selected:
+            lines.append(f"- {key}: {value}")
+
+        omitted = len(entries) - len(selected)
+        if omitted:
+            lines.append(
+                f"({omitted} more stored; use the `memory` tool's `search` action "
+                f"to look them up)"
+            )
+        return "\n".join(lines)
+
     def increment_turn(self) -> int:
         self._turn_count += 1
         self.updated_at = datetime.now()
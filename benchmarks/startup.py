@@ -0,0 +1,116 @@
+"""
+Startup time benchmark.
+
+Measures, each in fresh interpreters:
+
+- `import`: importing everything `main.py` imports, i.e. the fixed cost
+  paid before any work is done;
+- `--help`: running `main.py --help` end to end, interpreter start included;
+
+and lists the slowest top-level imports from `python -X importtime`, to show
+where the import time goes.
+
+    python benchmarks/startup.py [--runs N] [--top K]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The modules `main.py` pulls in before `main()` runs
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import agent.agent, agent.batch, agent.server, agent.persistence
+import ui.tui, ui.json_stream, config.loader
+import click, rich.panel, rich.table
+print(time.perf_counter() - start)
+"""
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def time_imports(runs: int) -> list[float]:
+    return [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", IMPORT_SNIPPET],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        )
+        for _ in range(runs)
+    ]
+
+
+def time_help(runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "main.py", "--help"],
+            cwd=ROOT,
+            capture_output=True,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowest_imports(top: int) -> list[tuple[str, float]]:
+    """Top-level packages by cumulative import time, in seconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    totals: dict[str, float] = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        # Only modules imported directly by the snippet, not their dependencies
+        if match and len(match.group(3)) == 1:
+            totals[match.group(4)] = int(match.group(2)) / 1e6
+
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def _summary(timings: list[float]) -> str:
+    return (
+        f"median {statistics.median(timings) * 1000:7.1f}ms  "
+        f"min {min(timings) * 1000:7.1f}ms  "
+        f"max {max(timings) * 1000:7.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Warm the OS file cache and bytecode so the first run isn't an outlier
+    time_imports(1)
+
+    print(f"import   {_summary(time_imports(args.runs))}")
+    print(f"--help   {_summary(time_help(args.runs))}")
+
+    print("\nslowest imports (cumulative):")
+    for name, seconds in slowest_imports(args.top):
+        print(f"  {seconds * 1000:7.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
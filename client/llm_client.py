@@ -1,28 +1,42 @@
+from __future__ import annotations
 from config.config import Config
 from client.response import parse_tool_call_arguments
 from client.response import ToolCall
 from client.response import ToolCallDelta
-from openai import APIError
-from openai import APIConnectionError
 import asyncio
-from openai import RateLimitError
+from typing import TYPE_CHECKING
 from typing import AsyncGenerator
 from client.response import StreamEventType
 from client.response import StreamEvent
 from client.response import TokenUsage
 from client.response import TextDelta
 from typing import Any
-from openai import AsyncOpenAI
+from client.rate_limit import LLMRateLimiter
+
+# openai is imported on first use (and preloaded in the background, see
+# utils/preload.py) rather than at startup
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 class LLMClient:
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self,
+        config: Config,
+        rate_limiter: LLMRateLimiter | None = None,
+    ) -> None:
         self._client: AsyncOpenAI | None = None
         self._max_retries: int = 3
         self.config = config
+        self.rate_limiter = rate_limiter or LLMRateLimiter(
+            config.llm_max_concurrent_requests,
+            config.llm_requests_per_minute,
+        )
 
     def get_client(self) -> AsyncOpenAI:
         if self._client is None:
+            from openai import AsyncOpenAI
+
             self._client = AsyncOpenAI(
                 base_url=self.config.base_url,
                 api_key=self.config.api_key,
@@ -61,6 +75,10 @@ class LLMClient:
         tools: list[dict[str, Any]] | None = None,
         stream: bool = True,
     ) -> AsyncGenerator[StreamEvent, None]:
+        from openai import APIConnectionError
+        from openai import APIError
+        from openai import RateLimitError
+
         client = self.get_client()
 
         kwargs = {
@@ -69,18 +87,23 @@ class LLMClient:
             "stream": stream,
         }
 
+        if stream:
+            # Token usage arrives in a final chunk; budgets depend on it
+            kwargs["stream_options"] = {"include_usage": True}
+
         if tools:
             kwargs["tools"] = self._build_tools(tools)
             kwargs["tool_choice"] = "auto"
 
         for attempt in range(self._max_retries + 1):
             try:
-                if stream:
-                    async for event in self._stream_response(client, kwargs):
+                async with self.rate_limiter.request():
+                    if stream:
+                        async for event in self._stream_response(client, kwargs):
+                            yield event
+                    else:
+                        event = await self._non_stream_response(client, kwargs)
                         yield event
-                else:
-                    event = await self._non_stream_response(client, kwargs)
-                yield event
                 return
             except RateLimitError as e:
                 if attempt < self._max_retries:
@@ -120,65 +143,67 @@ class LLMClient:
         usage: TokenUsage | None = None
         tool_calls: dict[int, dict[str, Any]] = {}
 
-        async for chunk in response:
-            if hasattr(chunk, "usage") and chunk.usage:
-                usage = TokenUsage(
-                    prompt_tokens=chunk.usage.prompt_tokens,
-                    completion_tokens=chunk.usage.completion_tokens,
-                    total_tokens=chunk.usage.total_tokens,
-                    cached_tokens=chunk.usage.prompt_tokens_details.cached_tokens,
-                )
+        try:
+            async for chunk in response:
+                if hasattr(chunk, "usage") and chunk.usage:
+                    usage = _token_usage(chunk.usage)
 
-            if not chunk.choices:
-                continue
+                if not chunk.choices:
+                    continue
 
-            choice = chunk.choices[0]
+                choice = chunk.choices[0]
 
-            delta = choice.delta
+                delta = choice.delta
 
-            if choice.finish_reason:
-                finish_reason = choice.finish_reason
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
 
-            if delta.content:
-                yield StreamEvent(
-                    type=StreamEventType.TEXT_DELTA,
-                    text_delta=TextDelta(content=delta.content),
-                )
+                if delta.content:
+                    yield StreamEvent(
+                        type=StreamEventType.TEXT_DELTA,
+                        text_delta=TextDelta(content=delta.content),
+                    )
+
+                if delta.tool_calls:
+                    for tool_call_delta in delta.tool_calls:
+                        idx = tool_call_delta.index
+
+                        if idx not in tool_calls:
+                            tool_calls[idx] = {
+                                "id": tool_call_delta.id or "",
+                                "name": "",
+                                "arguments": "",
+                            }
 
-            if delta.tool_calls:
-                for tool_call_delta in delta.tool_calls:
-                    idx = tool_call_delta.index
-
-                    if idx not in tool_calls:
-                        tool_calls[idx] = {
-                            "id": tool_call_delta.id or "",
-                            "name": "",
-                            "arguments": "",
-                        }
-
-                        if tool_call_delta.function:
-                            if tool_call_delta.function.name:
-                                tool_calls[idx]["name"] = tool_call_delta.function.name
-                                yield StreamEvent(
-                                    type=StreamEventType.TOOL_CALL_START,
-                                    tool_call_delta=ToolCallDelta(
-                                        call_id=tool_calls[idx]["id"],
-                                        name=tool_call_delta.function.name,
-                                    ),
-                                )
-
-                            if tool_call_delta.function.arguments:
-                                tool_calls[idx]["arguments"] += (
-                                    tool_call_delta.function.arguments
-                                )
-                                yield StreamEvent(
-                                    type=StreamEventType.TOOL_CALL_DELTA,
-                                    tool_call_delta=ToolCallDelta(
-                                        call_id=tool_calls[idx]["id"],
-                                        name=tool_call_delta.function.name,
-                                        arguments_delta=tool_call_delta.function.arguments,
-                                    ),
-                                )
+                            if tool_call_delta.function:
+                                if tool_call_delta.function.name:
+                                    tool_calls[idx][
+                                        "name"
+                                    ] = tool_call_delta.function.name
+                                    yield StreamEvent(
+                                        type=StreamEventType.TOOL_CALL_START,
+                                        tool_call_delta=ToolCallDelta(
+                                            call_id=tool_calls[idx]["id"],
+                                            name=tool_call_delta.function.name,
+                                        ),
+                                    )
+
+                                if tool_call_delta.function.arguments:
+                                    tool_calls[idx][
+                                        "arguments"
+                                    ] += tool_call_delta.function.arguments
+                                    yield StreamEvent(
+                                        type=StreamEventType.TOOL_CALL_DELTA,
+                                        tool_call_delta=ToolCallDelta(
+                                            call_id=tool_calls[idx]["id"],
+                                            name=tool_call_delta.function.name,
+                                            arguments_delta=tool_call_delta.function.arguments,
+                                        ),
+                                    )
+        finally:
+            # Release the connection even if the consumer stopped early
+            # (e.g. a cancelled subagent)
+            await response.close()
 
         for idx, tc in tool_calls.items():
             yield StreamEvent(
@@ -225,12 +250,7 @@ class LLMClient:
         usage = None
 
         if response.usage:
-            usage = TokenUsage(
-                prompt_tokens=response.usage.prompt_tokens,
-                completion_tokens=response.usage.completion_tokens,
-                total_tokens=response.usage.total_tokens,
-                cached_tokens=response.usage.prompt_tokens_details.cached_tokens,
-            )
+            usage = _token_usage(response.usage)
 
         return StreamEvent(
             type=StreamEventType.MESSAGE_COMPLETE,
@@ -238,3 +258,14 @@ class LLMClient:
             finish_reason=choice.finish_reason,
             usage=usage,
         )
+
+
+def _token_usage(usage: Any) -> TokenUsage:
+    # Not every OpenAI-compatible server reports prompt token details
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0,
+        total_tokens=usage.total_tokens or 0,
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+    )
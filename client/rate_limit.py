@@ -0,0 +1,66 @@
+"""
+Request budget shared by every LLM client in a session tree.
+
+Parallel subagents each have their own `LLMClient`, but they all draw from
+the parent session's limiter, so fanning out to N subagents can't open N
+times as many concurrent requests (or burn through the provider's rate
+limit N times as fast).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class LLMRateLimiter:
+    def __init__(
+        self,
+        max_concurrent: int,
+        requests_per_minute: int | None = None,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self._slots = asyncio.Semaphore(max_concurrent)
+        # Requests holding a slot, and requests queued for one
+        self.active = 0
+        self.waiting = 0
+        # Start times of requests in the last minute
+        self._started: deque[float] = deque()
+        self._rate_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def request(self) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of one LLM request."""
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            await self._wait_for_rate()
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def _wait_for_rate(self) -> None:
+        if not self.requests_per_minute:
+            return
+
+        async with self._rate_lock:
+            while True:
+                now = time.monotonic()
+                while self._started and now - self._started[0] >= 60:
+                    self._started.popleft()
+
+                if len(self._started) < self.requests_per_minute:
+                    self._started.append(now)
+                    return
+
+                await asyncio.sleep(60 - (now - self._started[0]))
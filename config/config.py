@@ -1,6 +1,7 @@
 from __future__ import annotations
 from pydantic import model_validator
 from typing import Any
+from typing import Literal
 import os
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -21,9 +22,28 @@ class ShellEnvironmentPolicy(BaseModel):
     set_vars: dict[str, str] = Field(default_factory=dict)
 
 
+class BudgetConfig(BaseModel):
+    """Spend limits for a session; unset limits are unenforced."""
+
+    max_prompt_tokens: int | None = Field(default=None, ge=1)
+    max_completion_tokens: int | None = Field(default=None, ge=1)
+    # Time spent working on requests, not idle time between them
+    max_wall_clock_sec: float | None = Field(default=None, gt=0)
+    # Past this fraction of any limit the agent is asked to wrap up
+    wrap_up_at: float = Field(default=0.9, gt=0, le=1)
+
+
 class MCPServerConfig(BaseModel):
     enabled: bool = True
     startup_timeout_sec: float = 10
+    # Register tools from the cached manifest and only start the server
+    # when one of its tools is first called
+    lazy: bool = True
+    # Calls to one server beyond this many wait for a free slot
+    max_concurrent_calls: int = Field(default=4, ge=1)
+    request_timeout_sec: float = 60
+    # How often running servers are pinged and restarted if dead; 0 disables
+    health_check_interval_sec: float = 30
 
     # stdio transport
     command: str | None = None
@@ -51,18 +71,37 @@ class MCPServerConfig(BaseModel):
 
 
 class Config(BaseModel):
-    model: ModelConfig = Field(default=ModelConfig)
+    model: ModelConfig = Field(default_factory=ModelConfig)
     cwd: Path = Field(default=Path.cwd())
     shell_environment: ShellEnvironmentPolicy = Field(
         default_factory=ShellEnvironmentPolicy
     )
 
     max_turns: int = 100
+    budget: BudgetConfig = Field(default_factory=BudgetConfig)
 
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
 
     max_tool_output_tokens: int = 50_000
 
+    # Append each conversation to a log in the data directory (`--resume`)
+    persist_sessions: bool = True
+    # Older logs are deleted when a new one is started
+    max_saved_sessions: int = Field(default=100, ge=1)
+
+    # Memories injected into the system prompt; with more stored than this,
+    # only the ones most relevant to the current message are included
+    memory_top_k: int = Field(default=10, ge=0)
+
+    # Subagents a `parallel_subagents` call runs at once
+    max_parallel_subagents: int = Field(default=4, ge=1)
+    # LLM request budget shared by the main agent and all its subagents
+    llm_max_concurrent_requests: int = Field(default=4, ge=1)
+    llm_requests_per_minute: int | None = Field(default=None, ge=1)
+
+    # `ddgs` (DuckDuckGo and friends) or `static` (offline, for tests/benchmarks)
+    web_search_backend: Literal["ddgs", "static"] = "ddgs"
+
     allowed_tools: list[str] | None = Field(
         None,
         description="If set only these tools will be available to the agent",
@@ -2,6 +2,7 @@ from tools.base import Tool
 from config.config import Config
 from dataclasses import field
 from typing import Any
+from typing import Callable
 from utils.text import count_tokens
 from dataclasses import dataclass
 from prompts.system import get_system_prompt
@@ -39,12 +40,24 @@ class ContextManager:
         config: Config,
         user_memory: str | None = None,
         tools: list[Tool] | None = None,
+        on_message: Callable[[MessageItem], None] | None = None,
     ) -> None:
         self.config = config
+        # Called with every message added, e.g. to append it to the session log
+        self._on_message = on_message
+        self._user_memory = user_memory
+        self._tools = tools
         self._system_prompt = get_system_prompt(config, user_memory, tools)
         self._model_name = self.config.model_name
         self._messages: list(MessageItem) = []
 
+    def set_user_memory(self, user_memory: str | None) -> None:
+        if user_memory == self._user_memory:
+            return
+
+        self._user_memory = user_memory
+        self._system_prompt = get_system_prompt(self.config, user_memory, self._tools)
+
     def add_user_message(self, content: str) -> None:
         item = MessageItem(
             role="user",
@@ -55,7 +68,7 @@ class ContextManager:
             ),
         )
 
-        self._messages.append(item)
+        self._append(item)
 
     def add_assistant_message(
         self, content: str, tool_calls: list[dict[str, Any]] | None = None
@@ -70,7 +83,7 @@ class ContextManager:
             tool_calls=tool_calls or [],
         )
 
-        self._messages.append(item)
+        self._append(item)
 
     def add_tool_result(self, tool_call_id: str, content: str) -> None:
         item = MessageItem(
@@ -83,7 +96,16 @@ class ContextManager:
             ),
         )
 
+        self._append(item)
+
+    def _append(self, item: MessageItem) -> None:
         self._messages.append(item)
+        if self._on_message is not None:
+            self._on_message(item)
+
+    def restore(self, items: list[MessageItem]) -> None:
+        """Load a saved conversation; token counts are kept as stored."""
+        self._messages = list(items)
 
     def get_messages(self) -> list(dict[str, Any]):
         messages = []
@@ -0,0 +1,298 @@
+"""
+Process-wide store for the user's persistent memory entries.
+
+The JSON file is read once and served from memory afterwards. Changes are
+applied in memory immediately and written back shortly after (write-behind),
+so a burst of `set`s costs a single write. Each write takes an exclusive
+lock on a sidecar lock file, re-reads the file, replays this process's
+pending changes on top of it and replaces the file atomically, so
+concurrent agents don't overwrite each other's entries.
+
+Entries can be searched with BM25 over their keys and values, which lets
+the system prompt carry only the memories relevant to the current request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from config.loader import get_data_dir
+from utils.paths import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MEMORY_FILE_NAME = "user_memory.json"
+
+# Seconds to wait for more changes before writing them out
+FLUSH_DELAY = 0.5
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# (action, key, value): ("set", key, value), ("delete", key, None), ("clear", None, None)
+_Change = tuple[str, str | None, str | None]
+
+
+class MemoryStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, str] | None = None
+        self._pending: list[_Change] = []
+        self._mtime_ns: int | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.RLock()
+        self._index: _BM25Index | None = None
+
+    def entries(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._load())
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            return self._load().get(key)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, str, float]]:
+        """Return up to `limit` (key, value, score) entries ranked by BM25."""
+        with self._lock:
+            entries = self._load()
+            if self._index is None:
+                self._index = _BM25Index(entries)
+
+            return [
+                (key, entries[key], score)
+                for key, score in self._index.search(query, limit)
+            ]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._load()[key] = value
+            self._record(("set", key, value))
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entries = self._load()
+            if key not in entries:
+                return False
+
+            del entries[key]
+            self._record(("delete", key, None))
+            return True
+
+    def clear(self) -> int:
+        with self._lock:
+            entries = self._load()
+            count = len(entries)
+            entries.clear()
+            self._record(("clear", None, None))
+            return count
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+
+            if not self._pending:
+                return
+
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock():
+                    # Merge with whatever other processes wrote meanwhile
+                    entries = self._read_file()
+                    for change in self._pending:
+                        _apply(entries, change)
+
+                    atomic_write_text(
+                        self.path,
+                        json.dumps({"entries": entries}, indent=2, ensure_ascii=False),
+                    )
+                    self._mtime_ns = self._stat_mtime()
+            except OSError:
+                logger.exception(f"Failed to write memory file {self.path}")
+                return
+
+            self._entries = entries
+            self._index = None
+            self._pending.clear()
+
+    def _load(self) -> dict[str, str]:
+        mtime_ns = self._stat_mtime()
+
+        if self._entries is None or mtime_ns != self._mtime_ns:
+            # First use, or another process changed the file
+            entries = self._read_file()
+            for change in self._pending:
+                _apply(entries, change)
+
+            self._entries = entries
+            self._mtime_ns = mtime_ns
+            self._index = None
+
+        return self._entries
+
+    def _record(self, change: _Change) -> None:
+        self._index = None
+        if change[0] == "clear":
+            self._pending.clear()
+        self._pending.append(change)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+
+        if self._flush_handle is not None:
+            if self._flush_loop is loop:
+                return
+            # Scheduled on a loop that has since gone away
+            self._flush_handle.cancel()
+
+        self._flush_handle = loop.call_later(FLUSH_DELAY, self.flush)
+        self._flush_loop = loop
+
+    def _read_file(self) -> dict[str, str]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            entries = data.get("entries") or {}
+            return {str(k): str(v) for k, v in entries.items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError):
+            logger.warning(f"Ignoring unreadable memory file {self.path}")
+            return {}
+
+    def _stat_mtime(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _apply(entries: dict[str, str], change: _Change) -> None:
+    action, key, value = change
+
+    if action == "set":
+        entries[key] = value
+    elif action == "delete":
+        entries.pop(key, None)
+    elif action == "clear":
+        entries.clear()
+
+
+def _tokenize(text: str) -> list[str]:
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower())]
+
+
+def _stem(token: str) -> str:
+    # Crude suffix stripping so "formatting" matches "format"
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            stem = token[: -len(suffix)]
+            if suffix in ("ing", "ed") and stem[-1] == stem[-2]:
+                stem = stem[:-1]
+            return stem
+
+    return token
+
+
+class _BM25Index:
+    def __init__(self, entries: dict[str, str]) -> None:
+        self._docs: dict[str, Counter[str]] = {}
+        self._lengths: dict[str, int] = {}
+        document_frequency: Counter[str] = Counter()
+
+        for key, value in entries.items():
+            terms = _tokenize(f"{key} {value}")
+            self._docs[key] = Counter(terms)
+            self._lengths[key] = len(terms)
+            document_frequency.update(set(terms))
+
+        count = len(entries)
+        self._average_length = sum(self._lengths.values()) / count if count else 0
+        self._idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        terms = [term for term in set(_tokenize(query)) if term in self._idf]
+        if not terms:
+            return []
+
+        scores: list[tuple[str, float]] = []
+        for key, counts in self._docs.items():
+            length_norm = (
+                1 - BM25_B + BM25_B * (self._lengths[key] / (self._average_length or 1))
+            )
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += (
+                        self._idf[term]
+                        * frequency
+                        * (BM25_K1 + 1)
+                        / (frequency + BM25_K1 * length_norm)
+                    )
+            if score > 0:
+                scores.append((key, score))
+
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores[:limit]
+
+
+_stores: dict[Path, MemoryStore] = {}
+
+
+def get_memory_store(path: Path | None = None) -> MemoryStore:
+    """Return the shared store for `path` (default: the user memory file)."""
+    path = path or get_data_dir() / MEMORY_FILE_NAME
+
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = MemoryStore(path)
+
+    return store
+
+
+@atexit.register
+def flush_memory_stores() -> None:
+    for store in _stores.values():
+        store.flush()
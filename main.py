@@ -8,31 +8,111 @@ from rich.table import Table
 from rich import box
 from agent.events import AgentEventType
 from agent.agent import Agent
+from agent.session import Session
+from agent.persistence import find_session
+from agent.persistence import list_sessions
 import click
 import asyncio
+from dataclasses import asdict
+from typing import AsyncIterator
+from ui.json_stream import JsonEventWriter
+from agent.batch import BatchResult
+from agent.batch import BatchRunner
+from agent.batch import BatchTask
+from agent.batch import load_batch_tasks
+from agent.server import AgentServer
+from agent.server import default_socket_path
+from agent.server import default_token_path
+import json
 
 console = get_console()
 
 
 class CLI:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, resume_id: str | None = None):
         self.config = config
+        self.resume_id = resume_id
         self.agent: Agent | None = None
         self.tui = TUI(config=config, console=console)
 
+    def _create_agent(self) -> Agent:
+        session = Session(self.config, resume_id=self.resume_id)
+        return Agent(config=self.config, session=session)
+
     async def run_single(self, message: str) -> str | None:
-        async with Agent(config=self.config) as agent:
+        async with self._create_agent() as agent:
             self.agent = agent
+            self._print_mcp_failures()
             return await self._process_message(message)
 
+    async def run_json(self, prompt: str | None) -> bool:
+        """Headless mode: write events as NDJSON to stdout.
+
+        Runs `prompt`, or without one, each non-empty line of stdin in turn
+        within the same session. Returns False if any run ended in an error.
+        """
+        writer = JsonEventWriter()
+        ok = True
+
+        async with self._create_agent() as agent:
+            self.agent = agent
+            writer.record(
+                "session_start",
+                {
+                    "session_id": agent.session.session_id,
+                    "resumed_messages": agent.session.resumed_messages,
+                    "model": self.config.model_name,
+                    "cwd": str(self.config.cwd),
+                    "mcp_servers": [
+                        asdict(server)
+                        for server in agent.session.mcp_manager.startup_report
+                    ],
+                },
+            )
+
+            async for message in self._json_prompts(prompt):
+                async for event in agent.run(message):
+                    writer.event(event)
+                    if event.type == AgentEventType.AGENT_ERROR:
+                        ok = False
+
+        return ok
+
+    async def _json_prompts(self, prompt: str | None) -> AsyncIterator[str]:
+        if prompt is not None:
+            yield prompt
+            return
+
+        while True:
+            # Read off the event loop so MCP health checks etc. keep running
+            line = await asyncio.to_thread(sys.stdin.readline)
+            if not line:
+                return
+            if line.strip():
+                yield line.strip()
+
     async def run_interactive(self) -> str | None:
         self.tui.print_welcome(
             model=self.config.model_name,
             cwd=self.config.cwd,
-            commands=["/help", "/subagent", "/config", "/model", "/exit"],
+            commands=[
+                "/help",
+                "/subagent",
+                "/mcp",
+                "/sessions",
+                "/config",
+                "/model",
+                "/exit",
+            ],
         )
-        async with Agent(config=self.config) as agent:
+        async with self._create_agent() as agent:
             self.agent = agent
+            self.tui.print_mcp_startup(agent.session.mcp_manager.startup_report)
+            if agent.session.resumed_messages:
+                console.print(
+                    f"[dim]Resumed session {agent.session.session_id} "
+                    f"({agent.session.resumed_messages} messages)[/dim]"
+                )
 
             while True:
                 try:
@@ -49,6 +129,13 @@ class CLI:
                 except EOFError:
                     break
 
+            session = agent.session
+            if session.log is not None and session.log.path.exists():
+                console.print(
+                    f"\n[dim]Session saved; continue it with "
+                    f"--resume {session.session_id[:8]}[/dim]"
+                )
+
         console.print("\n[dim]Bye![/dim]")
 
     async def _handle_command(self, user_input: str) -> bool:
@@ -70,6 +157,8 @@ class CLI:
   /subagent list   List available subagents
   /subagent create Create a new subagent
   /subagent delete Delete a subagent
+  /mcp             Show MCP server health and call latency
+  /sessions        List saved sessions
   /model           Show current model
   /config          Show current configuration
   /exit            Exit the application""",
@@ -85,6 +174,14 @@ class CLI:
             )
             return True
 
+        elif command == "/mcp":
+            self.tui.print_mcp_status(self.agent.session.mcp_manager.clients)
+            return True
+
+        elif command == "/sessions":
+            self.tui.print_sessions(list_sessions())
+            return True
+
         elif command == "/config":
             console.print(f"[bold]CWD:[/bold] {self.config.cwd}")
             console.print(f"[bold]Model:[/bold] {self.config.model_name}")
@@ -113,6 +210,10 @@ class CLI:
 
         return False
 
+    def _print_mcp_failures(self) -> None:
+        report = self.agent.session.mcp_manager.startup_report
+        self.tui.print_mcp_startup([s for s in report if s.error is not None])
+
     def _list_subagents(self):
         from tools.subagent import SubagentTool
 
@@ -285,6 +386,12 @@ goal_prompt = \"\"\"
                 )
                 self.tui.start_spinner("Running")
 
+            elif event.type == AgentEventType.TOOL_CALL_PROGRESS:
+                self.tui.tool_call_progress(
+                    event.data.get("call_id", ""),
+                    event.data.get("content", ""),
+                )
+
             elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
                 self.tui.stop_spinner()
                 tool_name = event.data.get("name", "Unknown tool")
@@ -308,6 +415,47 @@ goal_prompt = \"\"\"
         return final_response
 
 
+async def run_batch(config: Config, tasks: list[BatchTask], concurrency: int) -> bool:
+    """Run a batch, writing each result as a JSON line to stdout as it
+    finishes and progress to stderr. Returns False if any prompt failed."""
+    done = 0
+
+    def on_result(result: BatchResult) -> None:
+        nonlocal done
+        done += 1
+        sys.stdout.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        click.echo(
+            f"[{done}/{len(tasks)}] {result.id}: {result.status} "
+            f"({result.elapsed:.1f}s)",
+            err=True,
+        )
+
+    results = await BatchRunner(config, concurrency).run(tasks, on_result)
+    return all(result.status == "ok" for result in results)
+
+
+async def run_server(config: Config, socket_path: Path | None, port: int | None):
+    server = AgentServer(config)
+    await server.start()
+
+    try:
+        if port is not None:
+            token_path = default_token_path()
+            click.echo(
+                f"Serving on 127.0.0.1:{port} (clients authenticate with the "
+                f"token in {token_path})",
+                err=True,
+            )
+            await server.serve_tcp("127.0.0.1", port, token_path)
+        else:
+            socket_path = socket_path or default_socket_path()
+            click.echo(f"Serving on {socket_path}", err=True)
+            await server.serve_unix(socket_path)
+    finally:
+        await server.close()
+
+
 @click.command()
 @click.argument("prompt", required=False)
 @click.option(
@@ -316,26 +464,128 @@ goal_prompt = \"\"\"
     type=click.Path(exists=True, file_okay=False, path_type=Path),
     help="Current working directory",
 )
+@click.option(
+    "--output",
+    "-o",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="`json` writes agent events as NDJSON to stdout instead of the TUI; "
+    "without a prompt, each stdin line is run as one",
+)
+@click.option(
+    "--batch",
+    "batch_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Run prompts from a JSONL file ({prompt, id?, cwd?} per line) and "
+    "write one JSON result per prompt to stdout",
+)
+@click.option(
+    "--concurrency",
+    "-j",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Prompts run at once in batch mode (raises "
+    "`llm_max_concurrent_requests` to match if it is lower)",
+)
+@click.option(
+    "--resume",
+    "resume_id",
+    help="Continue a saved session (its ID or a unique prefix of it)",
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    help="Run as a server hosting sessions over JSON-RPC (see agent/server.py)",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Unix socket for --serve (default: in the data directory)",
+)
+@click.option(
+    "--port",
+    type=click.IntRange(min=1, max=65535),
+    help="Serve on this localhost TCP port instead of a Unix socket; any "
+    "local user can connect, so clients must authenticate with the token the "
+    "server writes to its data directory",
+)
 def main(
     prompt: str | None,
     cwd: Path | None,
+    output: str,
+    batch_file: Path | None,
+    concurrency: int,
+    serve: bool,
+    socket_path: Path | None,
+    port: int | None,
+    resume_id: str | None,
 ):
+    json_output = output == "json"
+
+    def fail(error: str) -> None:
+        if json_output:
+            JsonEventWriter().record("error", {"error": error})
+        else:
+            console.print(f"[error]{error}[/error]")
+
+    modes = [
+        flag
+        for flag, used in (
+            ("--serve", serve),
+            ("--batch", batch_file is not None),
+            ("--resume", resume_id is not None),
+        )
+        if used
+    ]
+    if len(modes) > 1:
+        fail(f"{' and '.join(modes)} can't be used together")
+        sys.exit(1)
 
     try:
         config = load_config(cwd=cwd)
     except Exception as e:
-        console.print(f"[error]Configuration error: {e}[/error]")
+        fail(f"Configuration error: {e}")
         sys.exit(1)
 
     errors = config.validate()
     if errors:
         for error in errors:
-            console.print(f"[error]{error}[/error]")
+            fail(error)
         sys.exit(1)
 
-    cli = CLI(config)
+    if serve:
+        try:
+            asyncio.run(run_server(config, socket_path, port))
+        except KeyboardInterrupt:
+            pass
+        return
 
-    if prompt:
+    if batch_file is not None:
+        try:
+            tasks = load_batch_tasks(batch_file, config.cwd)
+        except (OSError, ValueError) as e:
+            fail(f"Batch file error: {e}")
+            sys.exit(1)
+
+        if not asyncio.run(run_batch(config, tasks, concurrency)):
+            sys.exit(1)
+        return
+
+    if resume_id is not None:
+        try:
+            find_session(resume_id)
+        except ValueError as e:
+            fail(str(e))
+            sys.exit(1)
+
+    cli = CLI(config, resume_id=resume_id)
+
+    if json_output:
+        if not asyncio.run(cli.run_json(prompt)):
+            sys.exit(1)
+    elif prompt:
         result = asyncio.run(cli.run_single(prompt))
         if result is None:
             sys.exit(1)
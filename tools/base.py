@@ -4,11 +4,14 @@ from pydantic import ValidationError
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Any
+from typing import Callable
 import abc
 from enum import Enum
 from pydantic import BaseModel
 from pydantic.json_schema import model_json_schema
 from config.config import Config
+from utils.diff import TextEdit
+from utils.diff import unified_diff
 
 
 class ToolKind(Enum):
@@ -29,35 +32,36 @@ class FileDiff:
     is_new_file: bool = False
     is_deletion: bool = False
 
-    def to_diff(self) -> str:
-        import difflib
-
-        old_lines = self.old_content.splitlines(keepends=True)
-        new_lines = self.new_content.splitlines(keepends=True)
-
-        if old_lines and not old_lines[-1].endswith("\n"):
-            old_lines[-1] += "\n"
-
-        if new_lines and not new_lines[-1].endswith("\n"):
-            new_lines[-1] += "\n"
+    # Known edit locations, lets to_diff skip comparing unchanged regions
+    edits: list[TextEdit] | None = None
 
+    def to_diff(self) -> str:
         old_name = "/dev/null" if self.is_new_file else str(self.path)
         new_name = "/dev/null" if self.is_deletion else str(self.path)
 
-        diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
+        return unified_diff(
+            self.old_content,
+            self.new_content,
             fromfile=old_name,
             tofile=new_name,
+            edits=self.edits,
         )
 
-        return "".join(diff)
+
+@dataclass
+class MultiFileDiff:
+    diffs: list[FileDiff] = field(default_factory=list)
+
+    def to_diff(self) -> str:
+        return "".join(diff.to_diff() for diff in self.diffs)
 
 
 @dataclass
 class ToolInvocation:
     params: dict[str, Any]
     cwd: Path
+    # Receives partial output while the tool is still running
+    on_progress: Callable[[str], None] | None = None
 
 
 @dataclass
@@ -67,7 +71,7 @@ class ToolResult:
     error: str | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
     truncated: bool = False
-    diff: FileDiff | None = None
+    diff: FileDiff | MultiFileDiff | None = None
     exit_code: int | None = None
 
     @classmethod
@@ -165,18 +169,27 @@ class Tool(abc.ABC):
             params=invocation.params,
         )
 
+    async def close(self) -> None:
+        """Release long-lived resources (processes, connections) held by the tool."""
+        return None
+
     def to_openai_schema(self) -> dict[str, Any]:
         schema = self.schema
         if isinstance(schema, type) and issubclass(schema, BaseModel):
             json_schema = model_json_schema(schema, mode="serialization")
+            parameters = {
+                "type": "object",
+                "properties": json_schema.get("properties", {}),
+                "required": json_schema.get("required", []),
+            }
+            if "$defs" in json_schema:
+                # Nested models are referenced as `#/$defs/...`
+                parameters["$defs"] = json_schema["$defs"]
+
             return {
                 "name": self.name,
                 "description": self.description,
-                "parameters": {
-                    "type": "object",
-                    "properties": json_schema.get("properties", {}),
-                    "required": json_schema.get("required", []),
-                },
+                "parameters": parameters,
             }
 
         if isinstance(schema, dict):
@@ -5,7 +5,7 @@ from tools.builtin.web_search import WebSearchTool
 from tools.builtin.glob import GlobTool
 from tools.builtin.grep import GrepTool
 from tools.builtin.list_dir import ListDirTool
-from tools.builtin.edit_file import EditTool
+from tools.builtin.edit_file import EditTool, MultiEditTool
 from tools.builtin.write_file import WriteFileTool
 from tools.builtin.read_file import ReadFileTool
 from tools.builtin.shell import ShellTool
@@ -14,6 +14,7 @@ __all__ = [
     "ReadFileTool",
     "WriteFileTool",
     "EditTool",
+    "MultiEditTool",
     "ShellTool",
     "ListDirTool",
     "GrepTool",
@@ -30,6 +31,7 @@ def get_all_builtin_tools() -> list[type]:
         ReadFileTool,
         WriteFileTool,
         EditTool,
+        MultiEditTool,
         ShellTool,
         ListDirTool,
         GrepTool,
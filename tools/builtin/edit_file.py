@@ -1,5 +1,12 @@
+from dataclasses import dataclass
+from dataclasses import field
 from pathlib import Path
 from tools.base import FileDiff
+from tools.base import MultiFileDiff
+from utils.diff import TextEdit
+from utils.diff import compose_edits
+from utils.paths import atomic_write_many
+from utils.paths import atomic_write_text
 from utils.paths import ensure_parent_dir
 from utils.paths import resolve_path
 from pydantic import BaseModel, Field
@@ -24,6 +31,36 @@ class EditParams(BaseModel):
     )
 
 
+class EditOperation(BaseModel):
+    path: str | None = Field(
+        None,
+        description="File for this edit. Defaults to the top-level `path`",
+    )
+    old_string: str = Field(
+        "",
+        description="The exact text to replace. Leave empty only to create a new file",
+    )
+    new_string: str = Field(..., description="The replacement text")
+    replace_all: bool = Field(
+        False, description="Replace all occurrences of old_string (default: false)"
+    )
+
+
+class MultiEditParams(BaseModel):
+    path: str | None = Field(
+        None,
+        description="Default file for edits that don't set their own `path`",
+    )
+    edits: list[EditOperation] = Field(
+        ...,
+        min_length=1,
+        description=(
+            "Replacements to apply, in order. Edits to the same file are applied "
+            "sequentially, so later edits see the result of earlier ones."
+        ),
+    )
+
+
 class EditTool(Tool):
     name = "edit"
     description = (
@@ -47,7 +84,7 @@ class EditTool(Tool):
                 )
 
             ensure_parent_dir(path)
-            path.wrire_text(params.new_string, encoding="utf-8")
+            atomic_write_text(path, params.new_string)
 
             line_count = len(params.new_string.splitlines())
 
@@ -73,12 +110,55 @@ class EditTool(Tool):
                 "old_string is empty but file exists. Provide old_string to edit, or use write_file to overwrite"
             )
 
-        occurrence_count = old_content.count(params.old_string)
+        applied = self._apply_replacement(
+            old_content,
+            params.old_string,
+            params.new_string,
+            params.replace_all,
+            path,
+        )
+        if isinstance(applied, ToolResult):
+            return applied
+
+        new_content, replace_count, edits = applied
+
+        try:
+            atomic_write_text(path, new_content)
+        except IOError as e:
+            return ToolResult.error_result(f"Failed to write file: {e}")
+
+        line_diff = self._line_diff(old_content, new_content)
+        diff_msg = self._line_diff_message(line_diff)
+
+        return ToolResult.success_result(
+            f"Edited {path}: {replace_count} occurrence{'s' if replace_count != 1 else ''} {diff_msg}",
+            diff=FileDiff(
+                path=path,
+                old_content=old_content,
+                new_content=new_content,
+                edits=edits,
+            ),
+            metadata={
+                "path": str(path),
+                "replace_count": replace_count,
+                "line_diff": line_diff,
+            },
+        )
+
+    def _apply_replacement(
+        self,
+        content: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool,
+        path: Path,
+    ) -> tuple[str, int, list[TextEdit]] | ToolResult:
+        occurrence_count = content.count(old_string)
 
         if occurrence_count == 0:
-            return self._no_match_error(params.old_string, old_content, path)
+            return self._no_match_error(old_string, content, path)
 
-        if occurrence_count > 1 and not params.replace_all:
+        if occurrence_count > 1 and not replace_all:
             return ToolResult.error_result(
                 f"old_string found {occurrence_count} times  in {path}. "
                 f"Either: \n"
@@ -89,47 +169,47 @@ class EditTool(Tool):
                 },
             )
 
-        if params.replace_all:
-            new_content = old_content.replace(params.old_string, params.new_string)
-            replace_count = occurrence_count
-        else:
-            new_content = old_content.replace(params.old_string, params.new_string, 1)
-            replace_count = 1
+        limit = occurrence_count if replace_all else 1
+        parts: list[str] = []
+        edits: list[TextEdit] = []
+        position = 0
+        shift = 0
 
-        if new_content == old_content:
-            return ToolResult.error_result(
-                "No changes made - old_string equals new_strinc"
+        for _ in range(limit):
+            start = content.find(old_string, position)
+            parts.append(content[position:start])
+            parts.append(new_string)
+            edits.append(
+                TextEdit(
+                    old_start=start,
+                    old_end=start + len(old_string),
+                    new_start=start + shift,
+                    new_end=start + shift + len(new_string),
+                )
             )
+            shift += len(new_string) - len(old_string)
+            position = start + len(old_string)
 
-        try:
-            path.write_text(new_content, encoding="utf-8")
-        except IOError as e:
-            return ToolResult.error_result(f"Failed to write file: {e}")
+        parts.append(content[position:])
+        new_content = "".join(parts)
 
-        old_lines = len(old_content.splitlines())
-        new_lines = len(new_content.splitlines())
-        line_diff = new_lines - old_lines
+        if new_content == content:
+            return ToolResult.error_result(
+                "No changes made - old_string equals new_string"
+            )
+
+        return new_content, limit, edits
 
-        diff_msg = ""
+    def _line_diff(self, old_content: str, new_content: str) -> int:
+        return len(new_content.splitlines()) - len(old_content.splitlines())
 
+    def _line_diff_message(self, line_diff: int) -> str:
         if line_diff > 0:
-            diff_msg = f" (+{line_diff} line{'s' if line_diff != 1 else ''})"
+            return f" (+{line_diff} line{'s' if line_diff != 1 else ''})"
         elif line_diff < 0:
-            diff_msg = f" (-{abs(line_diff)} line{'s' if abs(line_diff) != 1 else ''})"
+            return f" (-{abs(line_diff)} line{'s' if abs(line_diff) != 1 else ''})"
 
-        return ToolResult.success_result(
-            f"Edited {path}: {replace_count} occurrence{'s' if replace_count != 1 else ''} {diff_msg}",
-            diff=FileDiff(
-                path=path,
-                old_content=old_content,
-                new_content=new_content,
-            ),
-            metadata={
-                "path": str(path),
-                "replace_count": replace_count,
-                "line_diff": line_diff,
-            },
-        )
+        return ""
 
     def _no_match_error(self, old_string: str, content: str, path: Path) -> ToolResult:
         lines = content.splitlines()
@@ -162,3 +242,132 @@ class EditTool(Tool):
             )
 
         return ToolResult.error_result(error_msg)
+
+
+@dataclass
+class _PendingFileEdit:
+    original: str | None
+    content: str
+    edit_count: int = 0
+    edits: list[TextEdit] = field(default_factory=list)
+
+
+class MultiEditTool(EditTool):
+    name = "multi_edit"
+    description = (
+        "Apply several exact-text replacements to one or more files in a single call. "
+        "Every edit is validated before anything is written; if any edit fails, no file "
+        "is changed. Prefer this over repeated `edit` calls for multi-hunk refactors."
+    )
+    kind = ToolKind.WRITE
+    schema = MultiEditParams
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = MultiEditParams(**invocation.params)
+
+        files: dict[Path, _PendingFileEdit] = {}
+
+        for index, edit in enumerate(params.edits, start=1):
+            raw_path = edit.path or params.path
+            if not raw_path:
+                return ToolResult.error_result(
+                    f"Edit {index}: no path given and no default `path` set"
+                )
+
+            path = resolve_path(invocation.cwd, raw_path)
+
+            if path not in files:
+                if path.exists():
+                    try:
+                        content = path.read_text(encoding="utf-8")
+                    except (OSError, UnicodeDecodeError) as e:
+                        return ToolResult.error_result(
+                            f"Edit {index}: failed to read {path}: {e}"
+                        )
+                    files[path] = _PendingFileEdit(original=content, content=content)
+                elif edit.old_string:
+                    return ToolResult.error_result(
+                        f"Edit {index}: file does not exist: '{path}'. "
+                        f"To create a new file, use an empty old_string"
+                    )
+                else:
+                    files[path] = _PendingFileEdit(
+                        original=None, content=edit.new_string, edit_count=1
+                    )
+                    continue
+
+            pending = files[path]
+
+            if not edit.old_string:
+                return ToolResult.error_result(
+                    f"Edit {index}: old_string is empty but {path} already exists"
+                )
+
+            applied = self._apply_replacement(
+                pending.content,
+                edit.old_string,
+                edit.new_string,
+                edit.replace_all,
+                path,
+            )
+            if isinstance(applied, ToolResult):
+                applied.error = f"Edit {index}: {applied.error}"
+                return applied
+
+            pending.content = applied[0]
+            pending.edits = compose_edits(pending.edits, applied[2])
+            pending.edit_count += 1
+
+        changed = {
+            path: pending
+            for path, pending in files.items()
+            if pending.original != pending.content
+        }
+        if not changed:
+            return ToolResult.error_result("No changes made - edits had no effect")
+
+        try:
+            for path, pending in changed.items():
+                if pending.original is None:
+                    ensure_parent_dir(path)
+            atomic_write_many(
+                {path: pending.content for path, pending in changed.items()}
+            )
+        except OSError as e:
+            return ToolResult.error_result(f"Failed to write files: {e}")
+
+        diffs: list[FileDiff] = []
+        summary_lines: list[str] = []
+        total_line_diff = 0
+
+        for path, pending in changed.items():
+            is_new_file = pending.original is None
+            edit_count = pending.edit_count
+            line_diff = self._line_diff(pending.original or "", pending.content)
+            total_line_diff += line_diff
+
+            action = "Created" if is_new_file else "Edited"
+            summary_lines.append(
+                f"{action} {path}: {edit_count} edit{'s' if edit_count != 1 else ''}"
+                f"{self._line_diff_message(line_diff)}"
+            )
+            diffs.append(
+                FileDiff(
+                    path=path,
+                    old_content=pending.original or "",
+                    new_content=pending.content,
+                    is_new_file=is_new_file,
+                    edits=pending.edits or None,
+                )
+            )
+
+        return ToolResult.success_result(
+            "\n".join(summary_lines),
+            diff=MultiFileDiff(diffs=diffs),
+            metadata={
+                "paths": [str(path) for path in changed],
+                "edits": len(params.edits),
+                "files": len(changed),
+                "line_diff": total_line_diff,
+            },
+        )
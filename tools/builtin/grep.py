@@ -1,4 +1,10 @@
-from utils.paths import is_binary_file
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from dataclasses import field
+from typing import AsyncGenerator
+from typing import Iterator
+from utils.text import estimate_tokens
 from pathlib import Path
 import os
 import re
@@ -9,6 +15,17 @@ from tools.base import ToolKind
 from pydantic import BaseModel, Field
 from tools.base import Tool
 
+OUTPUT_MODES = ("content", "files_with_matches", "count")
+
+IGNORED_DIRS = {".git", ".venv", "__pycache__", "node_modules", "venv"}
+
+# Constructs whose meaning depends on what surrounds a line: \A and \Z
+# anchor to the whole text, and lookarounds can see the neighbouring lines
+_LINE_SENSITIVE = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+# Line breaks `str.splitlines` honours besides "\n"
+_OTHER_LINE_BREAKS = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
 
 class GrepParams(BaseModel):
     pattern: str = Field(description="Regex pattern to search for")
@@ -19,17 +36,64 @@ class GrepParams(BaseModel):
         False,
         description="Case-insensitive search (default: false)",
     )
+    output_mode: str = Field(
+        "content",
+        description=(
+            "Output mode: `content` (matching lines), `files_with_matches` "
+            "(file paths only), `count` (match count per file). Default: `content`"
+        ),
+    )
+    context: int = Field(
+        0,
+        ge=0,
+        le=10,
+        description="Lines of context to show before and after each match (`content` mode only)",
+    )
+    max_matches: int = Field(
+        500,
+        ge=1,
+        le=5000,
+        description="Stop after this many matching lines (default: 500)",
+    )
+
+
+@dataclass
+class GrepMatch:
+    line_number: int
+    line: str
+    before: list[tuple[int, str]] = field(default_factory=list)
+    after: list[tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class GrepFileResult:
+    path: Path
+    match_count: int
+    matches: list[GrepMatch] = field(default_factory=list)
 
 
 class GrepTool(Tool):
     name = "grep"
-    description = "Search for a regex pattern in file content. Returns matching lines with file path and line number."
+    description = (
+        "Search for a regex pattern in file content. Returns matching lines with file path and line number. "
+        "Use output_mode `files_with_matches` or `count` when you only need to know where matches are; "
+        "they are much cheaper than `content`."
+    )
     kind = ToolKind.READ
     schema = GrepParams
 
+    MAX_FILES = 500
+    BINARY_SNIFF_BYTES = 8192
+
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = GrepParams(**invocation.params)
 
+        if params.output_mode not in OUTPUT_MODES:
+            return ToolResult.error_result(
+                f"Unknown output_mode: '{params.output_mode}'. "
+                f"Expected one of: {', '.join(OUTPUT_MODES)}"
+            )
+
         search_path = resolve_path(invocation.cwd, params.path)
 
         if not search_path.exists():
@@ -41,95 +105,235 @@ class GrepTool(Tool):
         except re.error as e:
             return ToolResult.error_result(f"Invalid regex pattern: {e}")
 
-        if search_path.is_dir():
-            files = self._find_files(search_path)
-        else:
-            files = [search_path]
+        token_budget = self.config.max_tool_output_tokens
 
-        output_lines = []
+        output_lines: list[str] = []
+        used_tokens = 0
         matches = 0
+        files_matched = 0
+        stats = {"files_searched": 0}
+        stopped_reason: str | None = None
 
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding="utf-8")
-            except Exception:
-                continue
+        # sample (content mode):
+        # === path/to/file ===
+        # line number: line content
+        #
+        # e.g:
+        # === main.py ===
+        # 1: def main():
+        # 2:     print("Hello, world!")
 
-            lines = content.splitlines()
-            file_matches = False
+        results = self.iter_matches(
+            pattern,
+            search_path,
+            output_mode=params.output_mode,
+            context=params.context,
+            stats=stats,
+        )
 
-            # sample:
-            # === path/to/file ===
-            # line number: line content
+        try:
+            async for file_result in results:
+                relative_path = self._display_path(file_result.path, invocation.cwd)
 
-            # e.g:
-            # === main.py ===
-            # 1: def main():
-            # 2:     print("Hello, world!")
+                remaining = params.max_matches - matches
+                if params.output_mode == "content":
+                    shown = file_result.matches[:remaining]
+                    block = self._format_content(
+                        relative_path, shown, params.context
+                    )
+                    matches += len(shown)
+                else:
+                    matches += file_result.match_count
+                    if params.output_mode == "count":
+                        block = [f"{relative_path}: {file_result.match_count}"]
+                    else:
+                        block = [str(relative_path)]
 
-            # === main2.py ===
-            # 1: def main():
-            # 2:     print("Hello, world!")
+                block_tokens = estimate_tokens("\n".join(block))
+                if output_lines and used_tokens + block_tokens > token_budget:
+                    stopped_reason = "token budget"
+                    break
 
-            for i, line in enumerate(lines, start=1):
-                if pattern.search(line):
-                    matches += 1
-                    if not file_matches:
-                        try:
-                            relative_path = file_path.relative_to(invocation.cwd)
-                        except Exception:
-                            relative_path = file_path
-                        output_lines.append(f"=== {relative_path} ===")
-                        file_matches = True
+                output_lines.extend(block)
+                used_tokens += block_tokens
+                files_matched += 1
 
-                    output_lines.append(f"{i}: {line}")
+                if params.output_mode == "content" and matches >= params.max_matches:
+                    stopped_reason = f"{params.max_matches} matches"
+                    break
+        finally:
+            await results.aclose()
 
-            if file_matches:
-                output_lines.append("")
+        metadata = {
+            "path": str(search_path),
+            "output_mode": params.output_mode,
+            "matches": matches,
+            "files_matched": files_matched,
+            "files_searched": stats["files_searched"],
+        }
 
         if not output_lines:
             return ToolResult.success_result(
                 f"No matches found for pattern: '{params.pattern}'",
-                metadata={
-                    "path": str(search_path),
-                    "matches": 0,
-                    "files_searched": len(files),
-                },
+                metadata=metadata,
             )
 
-        if matches > 500:
+        if stopped_reason:
             output_lines.append(
-                f"... limited to 500 matches; ({matches - 500} more matches not shown)"
+                f"... search stopped early after reaching {stopped_reason}; "
+                f"narrow the pattern or path to see more"
             )
 
         return ToolResult.success_result(
-            "\n".join(output_lines),
-            metadata={
-                "path": str(search_path),
-                "matches": matches,
-                "files_searched": len(files),
-            },
+            "\n".join(output_lines).rstrip(),
+            truncated=stopped_reason is not None,
+            metadata=metadata,
         )
 
-    def _find_files(self, search_path: Path) -> list[Path]:
-        files = []
+    async def iter_matches(
+        self,
+        pattern: re.Pattern[str],
+        search_path: Path,
+        output_mode: str = "content",
+        context: int = 0,
+        stats: dict[str, int] | None = None,
+    ) -> AsyncGenerator[GrepFileResult, None]:
+        """Yield a GrepFileResult per matching file as the search progresses.
+
+        Closing the generator stops the scan, so callers can stop early once
+        they have enough results.
+        """
+        if search_path.is_dir():
+            files = self._iter_files(search_path)
+        else:
+            files = iter([search_path])
+
+        for file_path in files:
+            content = self._read_text_file(file_path)
+            if stats is not None:
+                stats["files_searched"] = stats.get("files_searched", 0) + 1
+
+            # Let other tasks (spinner, subagents) run between files
+            await asyncio.sleep(0)
+
+            if content is None:
+                continue
+
+            result = self._search_content(
+                file_path, content, pattern, output_mode, context
+            )
+            if result is not None:
+                yield result
+
+    def _search_content(
+        self,
+        file_path: Path,
+        content: str,
+        pattern: re.Pattern[str],
+        output_mode: str,
+        context: int,
+    ) -> GrepFileResult | None:
+        # Cheap whole-file check first; most files don't match at all. It
+        # must find every match the per-line scan below does, so it runs on
+        # the same lines joined by "\n" (where MULTILINE's ^ and $ agree with
+        # splitlines), and patterns that can see past a line skip it.
+        if not _LINE_SENSITIVE.search(pattern.pattern):
+            text = content
+            if _OTHER_LINE_BREAKS.search(content):
+                text = "\n".join(content.splitlines())
+            prefilter = re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+            if prefilter.search(text) is None:
+                return None
+
+        lines = content.splitlines()
+        result = GrepFileResult(path=file_path, match_count=0)
+
+        for i, line in enumerate(lines):
+            if not pattern.search(line):
+                continue
+
+            result.match_count += 1
+
+            if output_mode == "files_with_matches":
+                break
+
+            if output_mode == "count":
+                continue
+
+            match = GrepMatch(line_number=i + 1, line=line)
+            if context:
+                start = max(0, i - context)
+                end = min(len(lines), i + context + 1)
+                match.before = [(n + 1, lines[n]) for n in range(start, i)]
+                match.after = [(n + 1, lines[n]) for n in range(i + 1, end)]
+
+            result.matches.append(match)
+
+        if result.match_count == 0:
+            # The pattern only matched across a line boundary
+            return None
+
+        return result
+
+    def _format_content(
+        self,
+        relative_path: Path,
+        matches: list[GrepMatch],
+        context: int = 0,
+    ) -> list[str]:
+        lines = [f"=== {relative_path} ==="]
+        match_lines = {match.line_number for match in matches}
+        last_printed = 0
+
+        for match in matches:
+            for line_number, text in [
+                *match.before,
+                (match.line_number, match.line),
+                *match.after,
+            ]:
+                if line_number <= last_printed:
+                    continue
+
+                if context and last_printed and line_number > last_printed + 1:
+                    lines.append("--")
+
+                separator = ":" if line_number in match_lines else "-"
+                lines.append(f"{line_number}{separator} {text}")
+                last_printed = line_number
+
+        lines.append("")
+        return lines
+
+    def _display_path(self, file_path: Path, cwd: Path) -> Path:
+        try:
+            return file_path.relative_to(cwd)
+        except Exception:
+            return file_path
+
+    def _read_text_file(self, file_path: Path) -> str | None:
+        try:
+            data = file_path.read_bytes()
+        except OSError:
+            return None
+
+        if b"\x00" in data[: self.BINARY_SNIFF_BYTES]:
+            return None
+
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def _iter_files(self, search_path: Path) -> Iterator[Path]:
+        count = 0
 
         for root, dirs, filenames in os.walk(search_path):
-            dirs[:] = [
-                d
-                for d in dirs
-                if d
-                not in {".git", ".venv", "__pycache__", "node_modules", ".git", "venv"}
-            ]
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
             for filename in filenames:
                 if filename.startswith("."):
                     continue
 
-                file_path = Path(root) / filename
-
-                if not is_binary_file(file_path):
-                    files.append(file_path)
-                    if len(files) >= 500:
-                        return files
-
-        return files
+                yield Path(root) / filename
+                count += 1
+                if count >= self.MAX_FILES:
+                    return
@@ -1,65 +1,53 @@
-import json
-from config.loader import get_data_dir
+from context.memory import get_memory_store
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
 
 class MemoryParams(BaseModel):
     action: str = Field(
-        ..., description="Action: 'set', 'get', 'delete', 'list', 'clear'"
+        ...,
+        description="Action: 'set', 'get', 'delete', 'list', 'search', 'clear'",
     )
     key: str | None = Field(
         None, description="Memory key (required for `set`, `get`, `delete`)"
     )
     value: str | None = Field(None, description="Value to store (required for `set`)")
+    query: str | None = Field(
+        None, description="Keywords to look for (required for `search`)"
+    )
+    limit: int = Field(
+        10, ge=1, le=50, description="Maximum results for `search` (default: 10)"
+    )
 
 
 class MemoryTool(Tool):
     name = "memory"
-    description = "Store and retrieve persistent memory. Use this to remember user preferences, important context or notes."
+    description = (
+        "Store and retrieve persistent memory. Use this to remember user preferences, important context or notes. "
+        "Only the most relevant memories are shown in the system prompt; use `search` to find others."
+    )
     kind = ToolKind.MEMORY
     schema = MemoryParams
 
-    def _load_memory(self) -> dict:
-        data_dir = get_data_dir()
-        data_dir.mkdir(parents=True, exist_ok=True)
-        path = data_dir / "user_memory.json"
-
-        if not path.exists():
-            return {"entries": {}}
-
-        try:
-            content = path.read_text(encoding="utf-8")
-            return json.loads(content)
-        except Exception:
-            return {"entries": {}}
-
-    def _save_memory(self, memory: dict) -> None:
-        data_dir = get_data_dir()
-        data_dir.mkdir(parents=True, exist_ok=True)
-        path = data_dir / "user_memory.json"
-
-        path.write_text(json.dumps(memory, indent=2, ensure_ascii=False))
-
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = MemoryParams(**invocation.params)
+        store = get_memory_store()
+        action = params.action.lower()
 
-        if params.action.lower() == "set":
+        if action == "set":
             if not params.key or not params.value:
                 return ToolResult.error_result(
                     "`key` and `value` are required for 'set' action"
                 )
-            memory = self._load_memory()
-            memory["entries"][params.key] = params.value
-            self._save_memory(memory)
+            store.set(params.key, params.value)
 
             return ToolResult.success_result(f"Set memory: {params.key}")
-        elif params.action.lower() == "get":
+        elif action == "get":
             if not params.key:
                 return ToolResult.error_result("`key` required for 'get' action")
 
-            memory = self._load_memory()
-            if params.key not in memory.get("entries", {}):
+            value = store.get(params.key)
+            if value is None:
                 return ToolResult.success_result(
                     f"Memory not found: {params.key}",
                     metadata={
@@ -67,25 +55,21 @@ class MemoryTool(Tool):
                     },
                 )
             return ToolResult.success_result(
-                f"Memory found: {params.key}: {memory['entries'][params.key]}",
+                f"Memory found: {params.key}: {value}",
                 metadata={
                     "found": True,
                 },
             )
-        elif params.action == "delete":
+        elif action == "delete":
             if not params.key:
-                return ToolResult.error_result("`key` required for 'get' action")
-            memory = self._load_memory()
-            if params.key not in memory.get("entries", {}):
-                return ToolResult.success_result(f"Memory not found: {params.key}")
+                return ToolResult.error_result("`key` required for 'delete' action")
 
-            del memory["entries"][params.key]
-            self._save_memory(memory)
+            if not store.delete(params.key):
+                return ToolResult.success_result(f"Memory not found: {params.key}")
 
             return ToolResult.success_result(f"Deleted memory: {params.key}")
-        elif params.action == "list":
-            memory = self._load_memory()
-            entries = memory.get("entries", {})
+        elif action == "list":
+            entries = store.entries()
             if not entries:
                 return ToolResult.success_result(
                     "No memories stored",
@@ -103,11 +87,32 @@ class MemoryTool(Tool):
                     "found": True,
                 },
             )
-        elif params.action == "clear":
-            memory = self._load_memory()
-            count = len(memory.get("entries", {}))
-            memory["entries"] = {}
-            self._save_memory(memory)
+        elif action == "search":
+            if not params.query:
+                return ToolResult.error_result("`query` required for 'search' action")
+
+            results = store.search(params.query, params.limit)
+            if not results:
+                return ToolResult.success_result(
+                    f"No memories match: {params.query}",
+                    metadata={
+                        "found": False,
+                        "results": 0,
+                    },
+                )
+            lines = [f"Memories matching: {params.query}"]
+            for key, value, _ in results:
+                lines.append(f"  {key}: {value}")
+
+            return ToolResult.success_result(
+                "\n".join(lines),
+                metadata={
+                    "found": True,
+                    "results": len(results),
+                },
+            )
+        elif action == "clear":
+            count = store.clear()
             return ToolResult.success_result(f"Cleared {count} memory entries")
         else:
             return ToolResult.error_result(f"Unknown action: {params.action}")
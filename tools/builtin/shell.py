@@ -1,11 +1,17 @@
-from signal import signal
+import signal
 import asyncio
 import sys
 import fnmatch
 import os
 from pathlib import Path
+from typing import Callable
 from pydantic import BaseModel, Field
+from config.config import Config
 from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from tools.builtin.shell_output import HeadTailBuffer
+from tools.builtin.shell_output import ProgressEmitter
+from tools.builtin.shell_output import pump_stream
+from tools.builtin.shell_session import PersistentShell
 
 BLOCKED_COMMANDS = {
     "rm -rf /",
@@ -28,35 +34,78 @@ BLOCKED_COMMANDS = {
 }
 
 
+def is_blocked_command(command: str) -> bool:
+    command = command.lower().strip()
+    return any(blocked in command for blocked in BLOCKED_COMMANDS)
+
+
+def build_shell_environment(config: Config) -> dict[str, str]:
+    env = os.environ.copy()
+
+    shell_environment = config.shell_environment
+
+    if not shell_environment.ignore_default_excludes:
+        for pattern in shell_environment.exclude_patterns:
+            keys_to_remove = [
+                k for k in env.keys() if fnmatch.fnmatch(k.upper(), pattern.upper())
+            ]
+
+            for k in keys_to_remove:
+                del env[k]
+
+    if shell_environment.set_vars:
+        env.update(shell_environment.set_vars)
+
+    return env
+
+
 class ShellParams(BaseModel):
     command: str = Field(..., description="The shell command to execute")
     timeout: int = Field(
         120, ge=1, le=600, description="Timeout in seconds (default: 120)"
     )
     cwd: str | None = Field(None, description="Working directory for the command")
+    persistent: bool = Field(
+        False,
+        description=(
+            "Run in a long-lived shell that keeps the working directory, environment "
+            "variables and activated virtualenvs between calls. In this mode `cwd` "
+            "changes the shell's directory for later calls too (default: false)"
+        ),
+    )
+    shell_id: str = Field(
+        "default",
+        description="Name of the persistent shell to use; different names give independent shells",
+    )
 
 
 class ShellTool(Tool):
     name = "shell"
     kind = ToolKind.SHELL
-    description = "Execute a shell command. Use this for running system commands, scripts and CLI tools."
+    description = (
+        "Execute a shell command. Use this for running system commands, scripts and CLI tools. "
+        "Set persistent=true to run many related commands in one long-lived shell."
+    )
 
     schema = ShellParams
 
-    # async def execute(self, invocation: ToolInvocation) -> ToolResult:
-    #     return await super().execute(invocation)
+    MAX_PERSISTENT_SHELLS = 8
+    # stdout and stderr each keep this much from the start and the end
+    STDOUT_HEAD_TAIL = 40 * 1024
+    STDERR_HEAD_TAIL = 8 * 1024
+
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        self._shells: dict[str, PersistentShell] = {}
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = ShellParams(**invocation.params)
 
-        command = params.command.lower().strip()
-
-        for blocked in BLOCKED_COMMANDS:
-            if blocked in command:
-                return ToolResult.error_result(
-                    f"Command blocked for safety reasons: '{params.command}'",
-                    metadata={"blocked": True},
-                )
+        if is_blocked_command(params.command):
+            return ToolResult.error_result(
+                f"Command blocked for safety reasons: '{params.command}'",
+                metadata={"blocked": True},
+            )
 
         if params.cwd:
             cwd = Path(params.cwd)
@@ -69,6 +118,14 @@ class ShellTool(Tool):
         if not cwd.exists():
             return ToolResult.error_result(f"Working directory does not exist: '{cwd}'")
 
+        if params.persistent:
+            return await self._execute_persistent(
+                params,
+                default_cwd=invocation.cwd,
+                cwd=cwd if params.cwd else None,
+                on_progress=invocation.on_progress,
+            )
+
         env = self._build_environment()
 
         if sys.platform == "win32":
@@ -85,63 +142,154 @@ class ShellTool(Tool):
             start_new_session=True,
         )
 
-        try:
-            stdout_data, stderr_data = await asyncio.wait_for(
-                process.communicate(),
-                timeout=params.timeout,
+        stdout = self._stdout_buffer()
+        stderr = self._stderr_buffer()
+        # Both streams feed one progress line so the UI sees them interleaved
+        progress = ProgressEmitter(invocation.on_progress)
+
+        async def _communicate() -> None:
+            await asyncio.gather(
+                pump_stream(process.stdout, stdout, progress),
+                pump_stream(process.stderr, stderr, progress),
             )
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(_communicate(), timeout=params.timeout)
         except asyncio.TimeoutError:
+            await self._kill(process)
+            result = self._build_result(stdout, stderr, None)
+            result.success = False
+            result.error = f"Command timed out after {params.timeout} seconds"
+            return result
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+        finally:
+            progress.flush()
+
+        return self._build_result(stdout, stderr, process.returncode)
+
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None:
+            return
+
+        try:
             if sys.platform != "win32":
                 os.killpg(os.getpgid(process.pid), signal.SIGKILL)
             else:
                 process.kill()
-            await process.wait()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+    def _stdout_buffer(self) -> HeadTailBuffer:
+        return HeadTailBuffer(self.STDOUT_HEAD_TAIL, self.STDOUT_HEAD_TAIL)
+
+    def _stderr_buffer(self) -> HeadTailBuffer:
+        return HeadTailBuffer(self.STDERR_HEAD_TAIL, self.STDERR_HEAD_TAIL)
+
+    async def _execute_persistent(
+        self,
+        params: ShellParams,
+        default_cwd: Path,
+        cwd: Path | None,
+        on_progress: Callable[[str], None] | None = None,
+    ) -> ToolResult:
+        if sys.platform == "win32":
             return ToolResult.error_result(
-                f"Command timed out after {params.timeout} seconds",
+                "Persistent shells are not supported on Windows"
+            )
+
+        shell = self._shells.get(params.shell_id)
+        if shell is None:
+            if len(self._shells) >= self.MAX_PERSISTENT_SHELLS:
+                return ToolResult.error_result(
+                    f"Too many persistent shells (max {self.MAX_PERSISTENT_SHELLS}): "
+                    f"{', '.join(sorted(self._shells))}"
+                )
+            shell = PersistentShell(
+                name=params.shell_id,
+                cwd=default_cwd,
+                env=self._build_environment(),
+            )
+            self._shells[params.shell_id] = shell
+
+        stdout = self._stdout_buffer()
+
+        try:
+            run = await shell.run(
+                params.command,
+                timeout=params.timeout,
+                cwd=cwd,
+                stdout=stdout,
+                progress=ProgressEmitter(on_progress),
             )
+        except asyncio.TimeoutError:
+            self._shells.pop(params.shell_id, None)
+            result = self._build_result(stdout, self._stderr_buffer(), None)
+            result.success = False
+            result.error = (
+                f"Command timed out after {params.timeout} seconds. "
+                f"Persistent shell '{params.shell_id}' was killed; its state "
+                f"(cwd, environment) is lost and the next call starts a fresh shell"
+            )
+            result.metadata["shell_id"] = params.shell_id
+            return result
 
-        stdout = stdout_data.decode("utf-8", errors="replace")
-        stderr = stderr_data.decode("utf-8", errors="replace")
+        if run.shell_exited:
+            self._shells.pop(params.shell_id, None)
 
-        exit_code = process.returncode
+        result = self._build_result(run.stdout, run.stderr, run.exit_code)
+        result.metadata.update(
+            {
+                "shell_id": params.shell_id,
+                "cwd": run.cwd,
+                "shell_exited": run.shell_exited,
+            }
+        )
+        return result
 
+    def _build_result(
+        self,
+        stdout: HeadTailBuffer,
+        stderr: HeadTailBuffer,
+        exit_code: int | None,
+    ) -> ToolResult:
+        stdout_text = stdout.getvalue()
+        stderr_text = stderr.getvalue()
         output = ""
 
-        if stdout.strip():
-            output += stdout.rstrip()
+        if stdout_text.strip():
+            output += stdout_text.rstrip()
 
-        if stderr.strip():
+        if stderr_text.strip():
             output += "\n--- stderr ---"
-            output += stderr.rstrip()
+            output += stderr_text.rstrip()
 
-        if exit_code != 0:
+        if exit_code is not None and exit_code != 0:
             output += f"\nExit code: {exit_code}"
 
-        if len(output) > 100 * 1024:
-            output = output[: 100 * 1024] + "\n... [output truncated]"
+        omitted_bytes = stdout.omitted_bytes + stderr.omitted_bytes
 
         return ToolResult(
             success=exit_code == 0,
-            error=stderr if exit_code != 0 else None,
+            error=stderr_text if exit_code != 0 else None,
             exit_code=exit_code,
             output=output,
+            truncated=omitted_bytes > 0,
+            metadata={
+                "stdout_bytes": stdout.total_bytes,
+                "stderr_bytes": stderr.total_bytes,
+                "omitted_bytes": omitted_bytes,
+            },
         )
 
-    def _build_environment(self) -> dict[str, str]:
-        env = os.environ.copy()
-
-        shell_environment = self.config.shell_environment
-
-        if not shell_environment.ignore_default_excludes:
-            for pattern in shell_environment.exclude_patterns:
-                keys_to_remove = [
-                    k for k in env.keys() if fnmatch.fnmatch(k.upper(), pattern.upper())
-                ]
+    async def close(self) -> None:
+        shells = list(self._shells.values())
+        self._shells.clear()
+        for shell in shells:
+            await shell.close()
 
-                for k in keys_to_remove:
-                    del env[k]
-
-        if shell_environment.set_vars:
-            env.update(shell_environment.set_vars)
-
-        return env
+    def _build_environment(self) -> dict[str, str]:
+        return build_shell_environment(self.config)
@@ -0,0 +1,152 @@
+import sys
+from pathlib import Path
+from typing import Any
+from pydantic import BaseModel, Field
+from config.config import Config
+from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from tools.builtin.shell import build_shell_environment
+from tools.builtin.shell import is_blocked_command
+from tools.builtin.shell_jobs import ShellJob
+from tools.builtin.shell_jobs import ShellJobManager
+from utils.paths import resolve_path
+
+
+class ShellJobParams(BaseModel):
+    action: str = Field(
+        ...,
+        description=(
+            "Action: `start` (run `command` in the background), `poll` (new output "
+            "since the last poll), `wait` (block until the job exits or `timeout`), "
+            "`kill`, `list`"
+        ),
+    )
+    command: str | None = Field(None, description="Shell command to run (for `start`)")
+    cwd: str | None = Field(None, description="Working directory (for `start`)")
+    job_id: str | None = Field(None, description="Job ID (for `poll`, `wait`, `kill`)")
+    timeout: int = Field(
+        30,
+        ge=0,
+        le=600,
+        description="Seconds to wait for the job to exit (for `wait`, default: 30)",
+    )
+
+
+class ShellJobTool(Tool):
+    name = "shell_job"
+    kind = ToolKind.SHELL
+    description = (
+        "Run long shell commands (dev servers, builds, test suites) in the background. "
+        "`start` returns a job ID immediately; use `poll` to read new output, `wait` to "
+        "block until it finishes, and `kill` to stop it. Jobs are killed when the session ends."
+    )
+    schema = ShellJobParams
+
+    def __init__(self, config: Config, manager: ShellJobManager) -> None:
+        super().__init__(config)
+        self.manager = manager
+
+    def is_mutating(self, params: dict[str, Any]) -> bool:
+        return str(params.get("action", "")).lower() in {"start", "kill"}
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = ShellJobParams(**invocation.params)
+        action = params.action.lower()
+
+        if action == "start":
+            return await self._start(params, invocation.cwd)
+
+        if action == "list":
+            return self._list()
+
+        if action not in {"poll", "wait", "kill"}:
+            return ToolResult.error_result(
+                f"Unknown action: '{params.action}'. "
+                f"Expected one of: start, poll, wait, kill, list"
+            )
+
+        if not params.job_id:
+            return ToolResult.error_result(f"`job_id` is required for `{action}`")
+
+        job = self.manager.get(params.job_id)
+        if job is None:
+            return ToolResult.error_result(f"Job not found: '{params.job_id}'")
+
+        if action == "wait":
+            await self.manager.wait(job, params.timeout)
+        elif action == "kill":
+            await self.manager.kill(job)
+
+        return self._job_result(job, action)
+
+    async def _start(self, params: ShellJobParams, default_cwd: Path) -> ToolResult:
+        if not params.command:
+            return ToolResult.error_result("`command` is required for `start`")
+
+        if sys.platform == "win32":
+            return ToolResult.error_result(
+                "Background jobs are not supported on Windows"
+            )
+
+        if is_blocked_command(params.command):
+            return ToolResult.error_result(
+                f"Command blocked for safety reasons: '{params.command}'",
+                metadata={"blocked": True},
+            )
+
+        cwd = resolve_path(default_cwd, params.cwd) if params.cwd else default_cwd
+        if not cwd.is_dir():
+            return ToolResult.error_result(f"Working directory does not exist: '{cwd}'")
+
+        try:
+            job = await self.manager.start(
+                params.command,
+                cwd=cwd,
+                env=build_shell_environment(self.config),
+            )
+        except RuntimeError as e:
+            return ToolResult.error_result(str(e))
+
+        return ToolResult.success_result(
+            f"Started {job.id}: {job.command}\n"
+            f"Use `poll` or `wait` with job_id='{job.id}' to read its output.",
+            metadata=self._job_metadata(job, "start"),
+        )
+
+    def _list(self) -> ToolResult:
+        jobs = self.manager.list()
+        if not jobs:
+            return ToolResult.success_result("No background jobs", metadata={"jobs": 0})
+
+        lines = [
+            f"{job.id}  {job.status:<12} {job.elapsed:7.1f}s  {job.command}"
+            for job in jobs
+        ]
+        return ToolResult.success_result(
+            "\n".join(lines),
+            metadata={"jobs": len(jobs), "running": len(self.manager.running_jobs)},
+        )
+
+    def _job_result(self, job: ShellJob, action: str) -> ToolResult:
+        new_output = job.read_new_output()
+
+        output = f"{job.id} {job.status} after {job.elapsed:.1f}s"
+        if new_output.strip():
+            output += "\n" + new_output.rstrip()
+        else:
+            output += "\n(no new output)"
+
+        return ToolResult.success_result(
+            output,
+            exit_code=job.exit_code,
+            metadata=self._job_metadata(job, action),
+        )
+
+    def _job_metadata(self, job: ShellJob, action: str) -> dict[str, Any]:
+        return {
+            "action": action,
+            "job_id": job.id,
+            "status": job.status,
+            "running": job.is_running,
+            "exit_code": job.exit_code,
+            "output_bytes": job.output.total_bytes,
+        }
@@ -0,0 +1,184 @@
+"""
+Background shell jobs for the shell_job tool.
+
+A job is a `bash -c` process in its own process group whose combined
+stdout/stderr is pumped into two places: a HeadTailBuffer holding the
+job's overall output, and an "unread" buffer that each poll drains so the
+agent only sees output it hasn't seen yet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import signal
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from tools.builtin.shell_output import HeadTailBuffer
+from tools.builtin.shell_output import READ_CHUNK_SIZE
+
+# Output not yet returned by a poll; older bytes are dropped past this
+MAX_UNREAD_BYTES = 64 * 1024
+
+
+@dataclass
+class ShellJob:
+    id: str
+    command: str
+    cwd: Path
+    process: asyncio.subprocess.Process
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    killed: bool = False
+    output: HeadTailBuffer = field(default_factory=HeadTailBuffer)
+    _unread: bytearray = field(default_factory=bytearray)
+    _dropped_unread: int = 0
+    _reader: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.finished_at is None
+
+    @property
+    def exit_code(self) -> int | None:
+        return self.process.returncode if not self.is_running else None
+
+    @property
+    def status(self) -> str:
+        if self.is_running:
+            return "running"
+        if self.killed:
+            return "killed"
+        return f"exited ({self.exit_code})"
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def read_new_output(self) -> str:
+        """Return output produced since the last call."""
+        data = bytes(self._unread)
+        dropped = self._dropped_unread
+        self._unread.clear()
+        self._dropped_unread = 0
+
+        text = data.decode("utf-8", errors="replace")
+        if dropped:
+            text = f"... [{dropped} bytes not shown] ...\n{text}"
+
+        return text
+
+    def _write(self, chunk: bytes) -> None:
+        self.output.write(chunk)
+        self._unread.extend(chunk)
+
+        overflow = len(self._unread) - MAX_UNREAD_BYTES
+        if overflow > 0:
+            del self._unread[:overflow]
+            self._dropped_unread += overflow
+
+
+class ShellJobManager:
+    MAX_RUNNING_JOBS = 8
+    # Finished jobs kept around so their output can still be read
+    MAX_FINISHED_JOBS = 32
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, ShellJob] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def running_jobs(self) -> list[ShellJob]:
+        return [job for job in self._jobs.values() if job.is_running]
+
+    def get(self, job_id: str) -> ShellJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[ShellJob]:
+        return list(self._jobs.values())
+
+    async def start(self, command: str, cwd: Path, env: dict[str, str]) -> ShellJob:
+        if len(self.running_jobs) >= self.MAX_RUNNING_JOBS:
+            raise RuntimeError(
+                f"Too many running jobs (max {self.MAX_RUNNING_JOBS}); "
+                f"wait for or kill one first"
+            )
+
+        process = await asyncio.create_subprocess_exec(
+            "/bin/bash",
+            "-c",
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+            start_new_session=True,
+        )
+
+        job = ShellJob(
+            id=f"job-{next(self._ids)}",
+            command=command,
+            cwd=cwd,
+            process=process,
+        )
+        job._reader = asyncio.create_task(self._pump(job))
+        self._jobs[job.id] = job
+        self._prune_finished()
+
+        return job
+
+    async def wait(self, job: ShellJob, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the job to finish; True if it did."""
+        if not job.is_running:
+            return True
+
+        try:
+            await asyncio.wait_for(asyncio.shield(job._reader), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+    async def kill(self, job: ShellJob) -> None:
+        if not job.is_running:
+            return
+
+        job.killed = True
+        try:
+            os.killpg(os.getpgid(job.process.pid), signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            try:
+                job.process.kill()
+            except ProcessLookupError:
+                pass
+
+        await job._reader
+
+    async def close(self) -> None:
+        for job in self.running_jobs:
+            await self.kill(job)
+
+        self._jobs.clear()
+
+    async def _pump(self, job: ShellJob) -> None:
+        try:
+            while True:
+                chunk = await job.process.stdout.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                job._write(chunk)
+
+            await job.process.wait()
+        finally:
+            job.finished_at = time.monotonic()
+
+    def _prune_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if not job.is_running]
+
+        for job in finished[: max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
@@ -0,0 +1,107 @@
+"""
+Bounded capture of command output.
+
+Commands can print far more than we'd ever show the model, so output is
+kept as a fixed-size head plus a rolling tail; everything in between is
+counted and dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import time
+from typing import Callable
+
+DEFAULT_HEAD_BYTES = 40 * 1024
+DEFAULT_TAIL_BYTES = 40 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class HeadTailBuffer:
+    def __init__(
+        self,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+    ) -> None:
+        self._head_bytes = head_bytes
+        self._tail_bytes = tail_bytes
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.total_bytes = 0
+
+    @property
+    def omitted_bytes(self) -> int:
+        return self.total_bytes - len(self._head) - len(self._tail)
+
+    def write(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+
+        room = self._head_bytes - len(self._head)
+        if room > 0:
+            self._head.extend(data[:room])
+            data = data[room:]
+
+        if data:
+            self._tail.extend(data)
+            overflow = len(self._tail) - self._tail_bytes
+            if overflow > 0:
+                del self._tail[:overflow]
+
+    def getvalue(self) -> str:
+        head = self._head.decode("utf-8", errors="replace")
+        tail = self._tail.decode("utf-8", errors="replace")
+
+        if self.omitted_bytes:
+            return f"{head}\n... [{self.omitted_bytes} bytes omitted] ...\n{tail}"
+
+        return head + tail
+
+
+class ProgressEmitter:
+    """Forwards output text to a progress callback at most every `interval` seconds."""
+
+    def __init__(
+        self,
+        callback: Callable[[str], None] | None,
+        interval: float = 0.1,
+    ) -> None:
+        self._callback = callback
+        self._interval = interval
+        self._pending: list[str] = []
+        self._last_emit = 0.0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data: bytes) -> None:
+        if self._callback is None:
+            return
+
+        self._pending.append(self._decoder.decode(data))
+
+        now = time.monotonic()
+        if now - self._last_emit >= self._interval:
+            self._last_emit = now
+            self.flush()
+
+    def flush(self) -> None:
+        if self._callback is None or not self._pending:
+            return
+
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._callback(text)
+
+
+async def pump_stream(
+    stream: asyncio.StreamReader,
+    buffer: HeadTailBuffer,
+    progress: ProgressEmitter | None = None,
+) -> None:
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        buffer.write(chunk)
+        if progress is not None:
+            progress.feed(chunk)
@@ -0,0 +1,217 @@
+"""
+Long-lived bash processes for the shell tool's persistent mode.
+
+Each command is written to the shell's stdin wrapped so that, when it
+finishes, the shell prints a unique sentinel line carrying the exit code
+and the shell's working directory. stdout is read up to that sentinel;
+stderr goes to a per-shell temp file that is drained after every command.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shlex
+import signal
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from tools.builtin.shell_output import HeadTailBuffer
+from tools.builtin.shell_output import ProgressEmitter
+from tools.builtin.shell_output import READ_CHUNK_SIZE
+
+
+@dataclass
+class ShellRunResult:
+    stdout: HeadTailBuffer
+    stderr: HeadTailBuffer
+    exit_code: int | None
+    cwd: str | None = None
+    # The shell process ended (e.g. the command ran `exit`)
+    shell_exited: bool = False
+
+
+class PersistentShell:
+    def __init__(self, name: str, cwd: Path, env: dict[str, str]) -> None:
+        self.name = name
+        self.cwd = str(cwd)
+        self._env = env
+        self._process: asyncio.subprocess.Process | None = None
+        self._stderr_path: Path | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        fd, stderr_name = tempfile.mkstemp(prefix="ite-shell-", suffix=".stderr")
+        os.close(fd)
+        self._stderr_path = Path(stderr_name)
+
+        self._process = await asyncio.create_subprocess_exec(
+            "/bin/bash",
+            "--noprofile",
+            "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=self.cwd,
+            env=self._env,
+            start_new_session=True,
+        )
+
+    async def run(
+        self,
+        command: str,
+        timeout: float,
+        cwd: Path | None = None,
+        stdout: HeadTailBuffer | None = None,
+        progress: ProgressEmitter | None = None,
+    ) -> ShellRunResult:
+        """Run a command in the shell; raises asyncio.TimeoutError after killing it.
+
+        Pass `stdout` to keep the partial output of a command that times out.
+        """
+        stdout = stdout if stdout is not None else HeadTailBuffer()
+
+        async with self._lock:
+            if not self.is_alive:
+                await self.start()
+
+            marker = f"__ITE_DONE_{uuid.uuid4().hex}__"
+            script = f"eval {shlex.quote(command)}"
+            if cwd is not None:
+                script = f"cd {shlex.quote(str(cwd))} && {script}"
+
+            self._process.stdin.write(
+                (
+                    f"{script} < /dev/null 2> {shlex.quote(str(self._stderr_path))}\n"
+                    f"printf '\\n%s %s %s\\n' '{marker}' \"$?\" \"$PWD\"\n"
+                ).encode("utf-8")
+            )
+
+            try:
+                await self._process.stdin.drain()
+                return await asyncio.wait_for(
+                    self._read_until(marker.encode("utf-8"), stdout, progress),
+                    timeout=timeout,
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                await self.close()
+                raise
+            except (BrokenPipeError, ConnectionResetError):
+                return await self._exited_result(stdout)
+            finally:
+                if progress is not None:
+                    progress.flush()
+
+    async def _read_until(
+        self,
+        marker: bytes,
+        stdout: HeadTailBuffer,
+        progress: ProgressEmitter | None,
+    ) -> ShellRunResult:
+        needle = b"\n" + marker
+        # Only bytes that could still be the start of the sentinel are held
+        # back; everything before them goes straight to the buffer.
+        window = bytearray()
+
+        while True:
+            chunk = await self._process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                self._write_output(bytes(window), stdout, progress)
+                return await self._exited_result(stdout)
+
+            window.extend(chunk)
+            index = window.find(needle)
+
+            if index == -1:
+                # The sentinel starts with a newline, so anything before the
+                # last newline in reach of a partial match is plain output.
+                hold = window.rfind(b"\n", max(0, len(window) - len(needle) + 1))
+                flush_to = hold if hold != -1 else len(window)
+                self._write_output(bytes(window[:flush_to]), stdout, progress)
+                del window[:flush_to]
+                continue
+
+            line_end = window.find(b"\n", index + len(needle))
+            if line_end != -1:
+                self._write_output(bytes(window[:index]), stdout, progress)
+                status = window[index + len(needle) : line_end].decode(
+                    "utf-8", errors="replace"
+                )
+                return self._finish(stdout, status)
+
+    def _write_output(
+        self,
+        data: bytes,
+        stdout: HeadTailBuffer,
+        progress: ProgressEmitter | None,
+    ) -> None:
+        if not data:
+            return
+
+        stdout.write(data)
+        if progress is not None:
+            progress.feed(data)
+
+    def _finish(self, stdout: HeadTailBuffer, status: str) -> ShellRunResult:
+        exit_text, _, cwd = status.strip().partition(" ")
+        try:
+            exit_code = int(exit_text)
+        except ValueError:
+            exit_code = None
+
+        if cwd:
+            self.cwd = cwd
+
+        return ShellRunResult(
+            stdout=stdout,
+            stderr=self._drain_stderr(),
+            exit_code=exit_code,
+            cwd=self.cwd,
+        )
+
+    async def _exited_result(self, stdout: HeadTailBuffer) -> ShellRunResult:
+        exit_code = await self._process.wait()
+        stderr = self._drain_stderr()
+        await self.close()
+
+        return ShellRunResult(
+            stdout=stdout,
+            stderr=stderr,
+            exit_code=exit_code,
+            cwd=self.cwd,
+            shell_exited=True,
+        )
+
+    def _drain_stderr(self) -> HeadTailBuffer:
+        buffer = HeadTailBuffer()
+        if not self._stderr_path:
+            return buffer
+
+        try:
+            with open(self._stderr_path, "rb") as f:
+                while chunk := f.read(READ_CHUNK_SIZE):
+                    buffer.write(chunk)
+            self._stderr_path.write_bytes(b"")
+        except OSError:
+            pass
+
+        return buffer
+
+    async def close(self) -> None:
+        process, self._process = self._process, None
+
+        if process is not None and process.returncode is None:
+            try:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                process.kill()
+            await process.wait()
+
+        if self._stderr_path:
+            self._stderr_path.unlink(missing_ok=True)
+            self._stderr_path = None
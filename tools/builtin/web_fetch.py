@@ -1,9 +1,45 @@
-import httpx
-import html2text
-from bs4 import BeautifulSoup
+from __future__ import annotations
+import codecs
+from html import escape
+import importlib.util
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
+from config.config import Config
+from config.loader import get_data_dir
 from tools.base import ToolResult, ToolInvocation, ToolKind, Tool
 from pydantic import BaseModel, Field
+from utils.http_cache import CachedResponse
+from utils.http_cache import HttpCache
+
+# httpx, bs4 and html2text are imported on first use; together they are a
+# noticeable part of startup for a tool many sessions never call
+if TYPE_CHECKING:
+    import httpx
+
+# httpx only speaks HTTP/2 when the optional `h2` package is installed
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Optional; much faster HTML parsing than BeautifulSoup's html.parser tree
+_LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+
+MAX_DOWNLOAD_BYTES = 2 * 1024 * 1024
+MAX_OUTPUT_SIZE = 60 * 1024
+# HTML handed to html2text; well past what MAX_OUTPUT_SIZE of markdown needs
+MAX_CONVERT_CHARS = 8 * MAX_OUTPUT_SIZE
+
+_TEXT_CONTENT_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+    "application/x-yaml",
+    "application/yaml",
+}
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; ite/0.1; +https://github.com)",
+    "Accept": "text/html,application/xhtml+xml,application/json,text/plain;q=0.9,*/*;q=0.8",
+}
 
 
 class WebFetchParams(BaseModel):
@@ -32,19 +68,93 @@ _STRIP_TAGS = {
 }
 
 
-def _html_to_markdown(html: str) -> str:
-    """Convert raw HTML to clean, readable markdown."""
+def _is_text_content_type(content_type: str) -> bool:
+    mime = content_type.split(";")[0].strip().lower()
+    if not mime:
+        # Unlabelled; let the decoder deal with it
+        return True
+
+    return (
+        mime.startswith("text/")
+        or mime in _TEXT_CONTENT_TYPES
+        or mime.endswith(("+json", "+xml"))
+    )
+
+
+def _extract_main_html(html: str) -> str:
+    """Return the page's main content as HTML, with noisy tags removed.
+
+    Narrowing to the main content first means cleanup and conversion only
+    touch the part of the page we keep.
+    """
+    if _LXML_AVAILABLE:
+        try:
+            return _extract_main_html_lxml(html)
+        except Exception:
+            # lxml rejects some inputs (empty documents, strings carrying an
+            # XML encoding declaration); the slower parser copes with them
+            pass
+
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
+    main_content = (
+        soup.find("main")
+        or soup.find("article")
+        or soup.find("div", {"role": "main"})
+        or soup.body
+        or soup
+    )
 
     # Remove noisy tags entirely
-    for tag in soup.find_all(_STRIP_TAGS):
+    for tag in main_content.find_all(_STRIP_TAGS):
         tag.decompose()
 
-    # Prefer main content containers if available
-    main_content = (
-        soup.find("main") or soup.find("article") or soup.find("div", {"role": "main"})
+    target_html = str(main_content)
+    if len(target_html) > MAX_CONVERT_CHARS:
+        cut = target_html.rfind("<", 0, MAX_CONVERT_CHARS)
+        target_html = target_html[: cut if cut > 0 else MAX_CONVERT_CHARS]
+
+    return target_html
+
+
+def _extract_main_html_lxml(html: str) -> str:
+    # lxml builds the tree in C, far faster than BeautifulSoup's Python tree
+    from lxml import html as lxml_html
+
+    document = lxml_html.document_fromstring(html)
+    main_content = next(
+        (
+            found[0]
+            for query in ("//main", "//article", "//div[@role='main']", "//body")
+            if (found := document.xpath(query))
+        ),
+        document,
     )
-    target_html = str(main_content) if main_content else str(soup)
+
+    for tag in main_content.xpath(
+        " | ".join(f".//{name}" for name in sorted(_STRIP_TAGS))
+    ):
+        tag.drop_tree()
+
+    # Serialize child by child and stop once there is enough to convert
+    parts = [escape(main_content.text or "")]
+    size = len(parts[0])
+    for child in main_content:
+        part = lxml_html.tostring(child, encoding="unicode")
+        parts.append(part)
+        size += len(part)
+        if size >= MAX_CONVERT_CHARS:
+            break
+
+    return f"<div>{''.join(parts)}</div>"
+
+
+def _html_to_markdown(html: str) -> str:
+    """Convert raw HTML to clean, readable markdown."""
+    import html2text
+
+    target_html = _extract_main_html(html)
 
     converter = html2text.HTML2Text()
     converter.ignore_links = False
@@ -79,7 +189,33 @@ class WebFetchTool(Tool):
     kind = ToolKind.NETWORK
     schema = WebFetchParams
 
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        self._client: httpx.AsyncClient | None = None
+        self._cache = HttpCache(get_data_dir() / "http_cache")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        import httpx
+
+        # One pooled client per session so repeat fetches reuse connections
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=_HTTP2_AVAILABLE,
+                follow_redirects=True,
+                headers=_HEADERS,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        import httpx
+
         params = WebFetchParams(**invocation.params)
 
         parsed_url = urlparse(params.url)
@@ -89,20 +225,40 @@ class WebFetchTool(Tool):
                 "Invalid URL; url must start with http:// or https://"
             )
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; ite/0.1; +https://github.com)",
-            "Accept": "text/html,application/xhtml+xml,application/json,text/plain;q=0.9,*/*;q=0.8",
-        }
+        cached = self._cache.get(params.url)
+        if cached is not None and cached.is_fresh():
+            return self._build_result(cached, cache_status="hit")
+
+        request_headers = cached.validator_headers() if cached else {}
+        client = self._get_client()
 
         try:
-            async with httpx.AsyncClient(
+            request = client.build_request(
+                "GET",
+                params.url,
+                headers=request_headers,
                 timeout=httpx.Timeout(params.timeout),
-                follow_redirects=True,
-                headers=headers,
-            ) as client:
-                response = await client.get(params.url)
+            )
+            response = await client.send(request, stream=True)
+
+            try:
+                if response.status_code == 304 and cached is not None:
+                    self._cache.refresh(cached, response.headers)
+                    return self._build_result(cached, cache_status="revalidated")
+
                 response.raise_for_status()
-                raw_text = response.text
+
+                content_type = response.headers.get("content-type", "")
+                if not _is_text_content_type(content_type):
+                    return ToolResult.error_result(
+                        f"Unsupported content type: {content_type.split(';')[0]}; "
+                        f"web_fetch only returns text content",
+                        metadata={"status_code": response.status_code},
+                    )
+
+                body, complete = await self._read_body(response)
+            finally:
+                await response.aclose()
         except httpx.HTTPStatusError as e:
             return ToolResult.error_result(
                 f"HTTP {e.response.status_code}: {e.response.reason_phrase}"
@@ -111,7 +267,59 @@ class WebFetchTool(Tool):
         except Exception as e:
             return ToolResult.error_result(f"Request failed: {e}")
 
-        content_type = response.headers.get("content-type", "")
+        raw_text = body.decode(self._charset(response), errors="replace")
+
+        entry = None
+        if complete:
+            entry = self._cache.store(
+                params.url,
+                response.status_code,
+                response.headers,
+                raw_text,
+            )
+        if entry is None:
+            entry = CachedResponse(
+                url=params.url,
+                status_code=response.status_code,
+                text=raw_text,
+                headers={"content-type": content_type},
+            )
+
+        result = self._build_result(entry, cache_status="miss")
+        if not complete:
+            result.truncated = True
+            result.metadata["download_truncated"] = True
+
+        return result
+
+    async def _read_body(self, response: httpx.Response) -> tuple[bytes, bool]:
+        """Read up to MAX_DOWNLOAD_BYTES; the flag is False if the body was cut."""
+        chunks: list[bytes] = []
+        size = 0
+
+        async for chunk in response.aiter_bytes():
+            remaining = MAX_DOWNLOAD_BYTES - size
+            if len(chunk) > remaining:
+                chunks.append(chunk[:remaining])
+                return b"".join(chunks), False
+
+            chunks.append(chunk)
+            size += len(chunk)
+
+        return b"".join(chunks), True
+
+    def _charset(self, response: httpx.Response) -> str:
+        encoding = response.charset_encoding or "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            return "utf-8"
+
+        return encoding
+
+    def _build_result(self, response: CachedResponse, cache_status: str) -> ToolResult:
+        content_type = response.content_type
+        raw_text = response.text
 
         # JSON or plain text — return as-is, no conversion needed
         if "application/json" in content_type or "text/plain" in content_type:
@@ -121,10 +329,9 @@ class WebFetchTool(Tool):
             text = _html_to_markdown(raw_text)
 
         # Truncate if still too large
-        max_size = 60 * 1024  # 60KB
         truncated = False
-        if len(text) > max_size:
-            text = text[:max_size] + "\n... [truncated]"
+        if len(text) > MAX_OUTPUT_SIZE:
+            text = text[:MAX_OUTPUT_SIZE] + "\n... [truncated]"
             truncated = True
 
         return ToolResult.success_result(
@@ -133,6 +340,7 @@ class WebFetchTool(Tool):
             metadata={
                 "status_code": response.status_code,
                 "content_type": content_type.split(";")[0].strip(),
-                "content_length": len(response.content),
+                "content_length": len(raw_text),
+                "cache": cache_status,
             },
         )
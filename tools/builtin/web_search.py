@@ -1,6 +1,12 @@
+from __future__ import annotations
+import abc
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from tools.base import ToolResult, ToolInvocation, ToolKind, Tool
+from config.config import Config
 from pydantic import BaseModel, Field
-from ddgs import DDGS
 
 
 class WebSearchParams(BaseModel):
@@ -13,27 +19,156 @@ class WebSearchParams(BaseModel):
     )
 
 
+@dataclass
+class SearchResult:
+    title: str
+    url: str
+    snippet: str = ""
+
+
+class _SearchCache:
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list[SearchResult]]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: tuple) -> list[SearchResult] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return results
+
+    def put(self, key: tuple, results: list[SearchResult]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, results)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SearchBackend(abc.ABC):
+    name: str = "base"
+
+    def __init__(self) -> None:
+        # Results are cached per backend instance; two backends of the same
+        # kind (e.g. static ones with different canned results) don't mix
+        self.cache = _SearchCache(ttl=15 * 60, max_entries=256)
+
+    @abc.abstractmethod
+    async def search(self, query: str, max_results: int) -> list[SearchResult]:
+        pass
+
+
+class DDGSBackend(SearchBackend):
+    name = "ddgs"
+
+    async def search(self, query: str, max_results: int) -> list[SearchResult]:
+        # DDGS is synchronous; keep it off the event loop
+        return await asyncio.to_thread(self._search, query, max_results)
+
+    def _search(self, query: str, max_results: int) -> list[SearchResult]:
+        from ddgs import DDGS
+
+        results = DDGS().text(
+            query,
+            region="us-en",
+            safesearch="off",
+            timelimit="y",
+            max_results=max_results,
+            page=1,
+            backend="auto",
+        )
+
+        return [
+            SearchResult(
+                title=result.get("title", ""),
+                url=result.get("href", ""),
+                snippet=result.get("body", ""),
+            )
+            for result in results or []
+        ]
+
+
+class StaticSearchBackend(SearchBackend):
+    """Offline backend returning canned or synthetic results, for tests and benchmarks."""
+
+    name = "static"
+
+    def __init__(self, results: dict[str, list[SearchResult]] | None = None) -> None:
+        super().__init__()
+        self.results = results
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int) -> list[SearchResult]:
+        self.calls += 1
+
+        if self.results is not None:
+            return self.results.get(query, [])[:max_results]
+
+        return [
+            SearchResult(
+                title=f"Result {i} for {query}",
+                url=f"https://example.com/search/{i}",
+                snippet=f"Synthetic result {i} for '{query}'",
+            )
+            for i in range(1, max_results + 1)
+        ]
+
+
+SEARCH_BACKENDS: dict[str, type[SearchBackend]] = {
+    DDGSBackend.name: DDGSBackend,
+    StaticSearchBackend.name: StaticSearchBackend,
+}
+
+
+# Backends picked by `web_search_backend`, one per name for the whole
+# process so every session and subagent reuses the same cached results
+_shared_backends: dict[str, SearchBackend] = {}
+
+
+def get_search_backend(name: str) -> SearchBackend:
+    backend = _shared_backends.get(name)
+    if backend is None:
+        backend = SEARCH_BACKENDS[name]()
+        _shared_backends[name] = backend
+    return backend
+
+
 class WebSearchTool(Tool):
     name = "web_search"
     description = "Search the web for information. Returns search results with titles, URLs and snippets"
     kind = ToolKind.NETWORK
     schema = WebSearchParams
 
+    def __init__(self, config: Config, backend: SearchBackend | None = None) -> None:
+        super().__init__(config)
+        if backend is None:
+            backend = get_search_backend(config.web_search_backend)
+        self.backend = backend
+
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = WebSearchParams(**invocation.params)
 
-        try:
-            results = DDGS().text(
-                params.query,
-                region="us-en",
-                safesearch="off",
-                timelimit="y",
-                page=1,
-                backend="auto",
-            )
+        cache_key = (" ".join(params.query.lower().split()), params.max_results)
+        results = self.backend.cache.get(cache_key)
+        cached = results is not None
+
+        if results is None:
+            try:
+                results = await self.backend.search(params.query, params.max_results)
+            except Exception as e:
+                return ToolResult.error_result(f"Search failed: {e}")
 
-        except Exception as e:
-            return ToolResult.error_result(f"Search failed: {e}")
+            self.backend.cache.put(cache_key, results)
 
         if not results:
             return ToolResult.success_result(
@@ -41,16 +176,17 @@ class WebSearchTool(Tool):
                 metadata={
                     "query": params.query,
                     "results": 0,
+                    "cached": cached,
                 },
             )
 
         output_lines = [f"Search results for: {params.query}"]
 
         for i, result in enumerate(results, start=1):
-            output_lines.append(f"{i}. Title: {result['title']}")
-            output_lines.append(f"  URL: {result['href']}")
-            if result.get("body"):
-                output_lines.append(f"  Snippet: {result['body']}")
+            output_lines.append(f"{i}. Title: {result.title}")
+            output_lines.append(f"  URL: {result.url}")
+            if result.snippet:
+                output_lines.append(f"  Snippet: {result.snippet}")
             output_lines.append("")
 
         return ToolResult.success_result(
@@ -58,5 +194,6 @@ class WebSearchTool(Tool):
             metadata={
                 "query": params.query,
                 "results": len(results),
+                "cached": cached,
             },
         )
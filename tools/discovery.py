@@ -6,6 +6,7 @@ import importlib.util
 from typing import Any
 from pathlib import Path
 from tools.registry import ToolRegistry
+from tools.discovery_cache import get_discovery_cache
 from config.config import Config
 
 
@@ -41,6 +42,9 @@ class ToolDiscoveryManager:
                 tools.append(obj)
         return tools
 
+    def _load_tool_classes(self, file_path: Path) -> list[Tool]:
+        return self._find_tool_classes(self._load_tool_modules(file_path))
+
     def discover_from_directory(self, directory: Path) -> None:
         tool_dir = directory / ".ite" / "tools"
         if not tool_dir.exists() or not tool_dir.is_dir():
@@ -50,8 +54,10 @@ class ToolDiscoveryManager:
             try:
                 if tool_file.name.startswith("__"):
                     continue
-                module = self._load_tool_modules(tool_file)
-                tool_classes = self._find_tool_classes(module)
+                # Unchanged files were already executed by an earlier session
+                tool_classes = get_discovery_cache().get_or_load(
+                    "tool", tool_file, self._load_tool_classes
+                )
 
                 if not tool_classes:
                     continue
@@ -0,0 +1,78 @@
+"""
+Process-wide cache for files found by discovery.
+
+User tool modules (`.ite/tools/*.py`) and subagent definitions
+(`.ite/subagents/*.toml`) are loaded through this cache, keyed by path and
+checked against the file's mtime and size. An unchanged tool file is only
+executed once per process and an unchanged, valid TOML file only parsed
+once; every later session reuses the tool classes and definitions already
+loaded. Editing a file invalidates its entry, so the next session picks up
+the change.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Entry:
+    # (st_mtime_ns, st_size) when the value was loaded
+    stamp: tuple[int, int]
+    value: Any
+
+
+class DiscoveryCache:
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, Path], _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, kind: str, path: Path, load: Callable[[Path], T]) -> T:
+        """`load(path)`, or its earlier result for this `kind` of file if the
+        file hasn't changed since. Exceptions from `load` propagate and
+        aren't cached; neither is a `None` result, which loaders return for
+        files they skipped with a warning."""
+        path = path.resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            # Let the loader report the missing or unreadable file
+            return load(path)
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = (kind, path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.hits += 1
+                return entry.value
+
+        value = load(path)
+
+        with self._lock:
+            self.misses += 1
+            if value is not None:
+                self._entries[key] = _Entry(stamp, value)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = DiscoveryCache()
+
+
+def get_discovery_cache() -> DiscoveryCache:
+    return _cache
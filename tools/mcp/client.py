@@ -1,12 +1,35 @@
+from __future__ import annotations
 from typing import Any
+from typing import Callable
+import asyncio
+import logging
+import time
 from dataclasses import field
 from dataclasses import dataclass
 import os
-from fastmcp.client.transports import StdioTransport, SSETransport
 from enum import Enum
 from pathlib import Path
 from config.config import MCPServerConfig
-from fastmcp import Client
+from typing import TYPE_CHECKING
+import anyio
+
+# fastmcp takes over a second to import; it is loaded on the first connect,
+# so runs without MCP servers never pay for it
+if TYPE_CHECKING:
+    from fastmcp import Client
+    from fastmcp.client.transports import SSETransport
+    from fastmcp.client.transports import StdioTransport
+
+logger = logging.getLogger(__name__)
+
+# Delay before reconnecting after the Nth consecutive failure: 1s, 2s, 4s, ... 60s
+RECONNECT_BACKOFF_BASE = 1.0
+RECONNECT_BACKOFF_MAX = 60.0
+
+HEALTH_CHECK_TIMEOUT = 5.0
+
+# JSON-RPC error code the MCP SDK uses when the transport went away
+_CONNECTION_CLOSED = -32000
 
 
 class MCPServerStatus(str, Enum):
@@ -24,6 +47,55 @@ class MCPToolInfo:
     server_name: str = ""
 
 
+def _input_schema(tool: Any) -> dict[str, Any]:
+    # Newer MCP SDKs renamed `inputSchema` to `input_schema`
+    schema = getattr(tool, "input_schema", None)
+    if schema is None:
+        schema = getattr(tool, "inputSchema", None)
+    return schema or {}
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    if isinstance(
+        exc,
+        (
+            ConnectionError,
+            EOFError,
+            anyio.ClosedResourceError,
+            anyio.BrokenResourceError,
+            anyio.EndOfStream,
+        ),
+    ):
+        return True
+
+    # MCPError / McpError carry the JSON-RPC error code
+    code = getattr(exc, "code", None)
+    if code is None:
+        code = getattr(getattr(exc, "error", None), "code", None)
+    if code == _CONNECTION_CLOSED:
+        return True
+
+    return "connection closed" in str(exc).lower()
+
+
+@dataclass
+class ToolCallStats:
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    def record(self, latency: float, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+
 class MCPClient:
     def __init__(
         self,
@@ -36,14 +108,42 @@ class MCPClient:
         self.cwd = cwd
         self.status = MCPServerStatus.DISCONNECTED
         self._client: Client | None = None
+        self._connect_lock = asyncio.Lock()
 
         self._tools: dict[str, MCPToolInfo] = dict()
+        self.server_version: str | None = None
+        # Tools came from a cached manifest rather than the live server
+        self.manifest_cached = False
+        # Called when connecting finds a different tool list or version
+        self.on_tools_changed: Callable[[MCPClient], None] | None = None
+
+        self._call_slots = asyncio.Semaphore(config.max_concurrent_calls)
+        # Per-tool call latency and error counts
+        self.metrics: dict[str, ToolCallStats] = {}
+        self.restarts = 0
+        self.last_error: str | None = None
+        self._connected_once = False
+        self._failures = 0
+        self._next_attempt_at = 0.0
 
     @property
     def tools(self) -> list[MCPToolInfo]:
         return list(self._tools.values())
 
+    def load_manifest(
+        self,
+        tools: list[MCPToolInfo],
+        server_version: str | None,
+    ) -> None:
+        """Use a cached tool list so tools can be registered before connecting."""
+        self._tools = {tool.name: tool for tool in tools}
+        self.server_version = server_version
+        self.manifest_cached = True
+
     def _create_transport(self) -> StdioTransport | SSETransport:
+        from fastmcp.client.transports import SSETransport
+        from fastmcp.client.transports import StdioTransport
+
         if self.config.command:
             env = os.environ.copy()
             env.update(self.config.env)
@@ -51,7 +151,7 @@ class MCPClient:
                 command=self.config.command,
                 args=list(self.config.args),
                 env=env,
-                cwd=str(self.config.cwd) or str(self.cwd),
+                cwd=str(self.config.cwd or self.cwd),
             )
 
         else:
@@ -66,34 +166,144 @@ class MCPClient:
         self.status = MCPServerStatus.CONNECTING
 
         try:
+            from fastmcp import Client
+
             self._client = Client(transport=self._create_transport())
 
             await self._client.__aenter__()
 
-            tool_result = await self._client.list_tools()
+            server_version = self._server_version()
+            if (
+                self.manifest_cached
+                and server_version is not None
+                and server_version == self.server_version
+            ):
+                # Same server build as the cached manifest; trust it
+                self.status = MCPServerStatus.CONNECTED
+                self._connected_once = True
+                return
 
-            for tool in tool_result.tools:
-                self._tools[tool.name] = MCPToolInfo(
+            tools = {
+                tool.name: MCPToolInfo(
                     name=tool.name,
                     description=tool.description or "",
-                    input_schema=(
-                        tool.inputSchema if hasattr(tool, "inputSchema") else {}
-                    ),
+                    input_schema=_input_schema(tool),
                     server_name=self.name,
                 )
+                for tool in await self._client.list_tools()
+            }
 
+            changed = tools != self._tools or server_version != self.server_version
+            self._tools = tools
+            self.server_version = server_version
+            self.manifest_cached = False
             self.status = MCPServerStatus.CONNECTED
+            self._connected_once = True
+
+            if changed and self.on_tools_changed is not None:
+                self.on_tools_changed(self)
 
         except Exception:
             self.status = MCPServerStatus.ERROR
             raise
 
+    async def ensure_connected(self) -> None:
+        """Connect on first use or after the server died; concurrent callers share one attempt."""
+        if self.status == MCPServerStatus.CONNECTED:
+            return
+
+        async with self._connect_lock:
+            if self.status == MCPServerStatus.CONNECTED:
+                return
+
+            wait = self.retry_in
+            if wait > 0:
+                raise RuntimeError(
+                    f"MCP server '{self.name}' is unavailable ({self.last_error}); "
+                    f"retrying in {wait:.0f}s"
+                )
+
+            restarting = self._connected_once
+            try:
+                await asyncio.wait_for(
+                    self.connect(),
+                    timeout=self.config.startup_timeout_sec,
+                )
+            except BaseException as e:
+                await self._discard_client()
+                if isinstance(e, Exception):
+                    self.record_failure(str(e) or type(e).__name__)
+                raise
+
+            if restarting:
+                self.restarts += 1
+                logger.info(f"MCP server {self.name} restarted")
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until another connection attempt is allowed."""
+        return max(0.0, self._next_attempt_at - time.monotonic())
+
+    def record_failure(self, error: str) -> None:
+        """Note a failed start or lost connection and back off before retrying."""
+        self._failures += 1
+        self.last_error = error
+        delay = min(
+            RECONNECT_BACKOFF_BASE * 2 ** (self._failures - 1),
+            RECONNECT_BACKOFF_MAX,
+        )
+        self._next_attempt_at = time.monotonic() + delay
+
+    def _record_success(self) -> None:
+        self._failures = 0
+        self._next_attempt_at = 0.0
+
+    async def ping(self) -> bool:
+        """Check a connected server is responsive; drops the connection if not."""
+        client = self._client
+        if client is None or self.status != MCPServerStatus.CONNECTED:
+            return False
+
+        try:
+            alive = await asyncio.wait_for(client.ping(), timeout=HEALTH_CHECK_TIMEOUT)
+        except Exception:
+            alive = False
+
+        if alive:
+            self._record_success()
+        else:
+            logger.warning(f"MCP server {self.name} failed its health check")
+            await self._discard_client(client)
+            self.record_failure("health check failed")
+
+        return alive
+
+    def _server_version(self) -> str | None:
+        try:
+            return self._client.initialize_result.serverInfo.version
+        except AttributeError:
+            return None
+
+    async def _discard_client(self, expected: Client | None = None) -> None:
+        # With `expected`, leave alone a connection someone else already replaced
+        if expected is not None and self._client is not expected:
+            return
+
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception:
+                pass
+
+        self.status = MCPServerStatus.ERROR
+
     async def disconnect(self) -> None:
         if self._client:
             await self._client.__aexit__(None, None, None)
             self._client = None
 
-        self._tools.clear()
+        # Tools stay known (and registered) so a later call can reconnect
         self.status = MCPServerStatus.DISCONNECTED
 
     async def call_tool(
@@ -101,10 +311,36 @@ class MCPClient:
         tool_name: str,
         arguments: dict[str, Any],
     ) -> dict[str, Any]:
-        if not self._client or self.status != MCPServerStatus.CONNECTED:
-            raise RuntimeError(f"Not connected to server {self.name}")
+        async with self._call_slots:
+            await self.ensure_connected()
+
+            client = self._client
+            start = time.monotonic()
+            try:
+                result = await client.call_tool(
+                    tool_name,
+                    arguments,
+                    timeout=self.config.request_timeout_sec,
+                    raise_on_error=False,
+                )
+            except Exception as e:
+                self._record_call(tool_name, start, error=True)
+                if _is_connection_error(e):
+                    # The server died; the next call (or the health check)
+                    # restarts it. The call itself isn't retried since it may
+                    # not be safe to run twice.
+                    logger.warning(f"MCP server {self.name} connection lost: {e}")
+                    await self._discard_client(client)
+                    self.record_failure("connection lost")
+                    raise RuntimeError(
+                        f"MCP server '{self.name}' connection lost; "
+                        f"it will be restarted on the next call"
+                    ) from e
+                raise
+
+            self._record_call(tool_name, start, error=result.is_error)
+            self._record_success()
 
-        result = await self._client.call_tool(tool_name, arguments)
         output = []
         for item in result.content:
             if hasattr(item, "text"):
@@ -113,3 +349,9 @@ class MCPClient:
                 output.append(str(item))
 
         return {"output": "\n".join(output), "is_error": result.is_error}
+
+    def _record_call(self, tool_name: str, start: float, error: bool) -> None:
+        stats = self.metrics.get(tool_name)
+        if stats is None:
+            stats = self.metrics[tool_name] = ToolCallStats()
+        stats.record(time.monotonic() - start, error)
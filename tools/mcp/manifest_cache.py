@@ -0,0 +1,76 @@
+"""
+On-disk cache of MCP server tool manifests.
+
+Listing a server's tools means spawning and initializing it. The manifest
+is cached per server launch configuration (command, args, env, url, cwd),
+so later sessions can register the server's tools without starting it;
+the server is only spawned when one of its tools is actually called. The
+server version reported at that point is compared with the cached one,
+and the manifest is refreshed if it changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict
+from pathlib import Path
+from config.config import MCPServerConfig
+from tools.mcp.client import MCPToolInfo
+from utils.paths import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+def manifest_key(config: MCPServerConfig, cwd: Path) -> str:
+    launch = {
+        "command": config.command,
+        "args": list(config.args),
+        "env": dict(sorted(config.env.items())),
+        "url": config.url,
+        "cwd": str(config.cwd or cwd),
+    }
+    encoded = json.dumps(launch, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ManifestCache:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def load(self, key: str) -> tuple[str | None, list[MCPToolInfo]] | None:
+        """Return (server_version, tools) for a cached manifest, if any."""
+        path = self.directory / f"{key}.json"
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            tools = [MCPToolInfo(**tool) for tool in data["tools"]]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.debug(f"Ignoring unreadable MCP manifest {path}")
+            return None
+
+        return data.get("server_version"), tools
+
+    def save(
+        self,
+        key: str,
+        server_name: str,
+        server_version: str | None,
+        tools: list[MCPToolInfo],
+    ) -> None:
+        data = {
+            "server_name": server_name,
+            "server_version": server_version,
+            "stored_at": time.time(),
+            "tools": [asdict(tool) for tool in tools],
+        }
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.directory / f"{key}.json", json.dumps(data))
+        except OSError:
+            logger.debug(f"Failed to write MCP manifest for {server_name}")
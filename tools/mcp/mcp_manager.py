@@ -1,9 +1,31 @@
+from __future__ import annotations
+from dataclasses import dataclass
 from tools.mcp.mcp_tool import MCPTool
 from tools.mcp.client import MCPServerStatus
 from tools.registry import ToolRegistry
 import asyncio
+import importlib
+import logging
+import time
 from tools.mcp.client import MCPClient
+from tools.mcp.client import MCPToolInfo
+from tools.mcp.manifest_cache import ManifestCache
+from tools.mcp.manifest_cache import manifest_key
 from config.config import Config
+from config.loader import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MCPServerStartup:
+    name: str
+    status: MCPServerStatus
+    elapsed: float
+    tool_count: int = 0
+    error: str | None = None
+    # Tools registered from the manifest cache; the server isn't running yet
+    cached: bool = False
 
 
 class MCPManager:
@@ -11,51 +33,216 @@ class MCPManager:
         self.config = config
         self._clients: dict[str, MCPClient] = {}
         self._initialized = False
+        self.startup_report: list[MCPServerStartup] = []
+        self._cleanup_tasks: dict[str, asyncio.Task] = {}
+        self._supervisors: list[asyncio.Task] = []
+        self._manifests = ManifestCache(get_data_dir() / "mcp_manifests")
+        self._registry: ToolRegistry | None = None
 
     async def initialize(self) -> None:
         if self._initialized:
             return
 
         mcp_configs = self.config.mcp_servers
-        print(mcp_configs)
 
         if not mcp_configs:
             return
 
+        cached_report: list[MCPServerStartup] = []
+        to_connect: list[MCPClient] = []
+
         for name, server_config in mcp_configs.items():
             if not server_config.enabled:
                 continue
 
-            self._clients[name] = MCPClient(
+            client = MCPClient(
                 name=name,
                 config=server_config,
                 cwd=self.config.cwd,
             )
+            client.on_tools_changed = self._on_tools_changed
+            self._clients[name] = client
+
+            cached = None
+            if server_config.lazy:
+                cached = self._manifests.load(self._manifest_key(client))
+
+            if cached is None:
+                to_connect.append(client)
+                continue
+
+            server_version, tools = cached
+            client.load_manifest(tools, server_version)
+            cached_report.append(
+                MCPServerStartup(
+                    name=name,
+                    status=client.status,
+                    elapsed=0.0,
+                    tool_count=len(tools),
+                    cached=True,
+                )
+            )
 
-        connection_tasks = [
-            await asyncio.wait_for(client.connect())
-            for name, client in self._clients.items()
-        ]
+        if to_connect:
+            # Import fastmcp off the event loop and outside the servers'
+            # startup timeouts (see tools/mcp/client.py)
+            await asyncio.to_thread(importlib.import_module, "fastmcp")
 
-        await asyncio.gather(*connection_tasks, return_exceptions=True)
+        # Servers without a cached manifest connect concurrently; a slow or
+        # broken one only costs its own timeout and doesn't keep the others
+        # from being used
+        connected_report = await asyncio.gather(
+            *(self._connect(client) for client in to_connect)
+        )
+        self.startup_report = [*connected_report, *cached_report]
+
+        for client in self._clients.values():
+            if client.config.health_check_interval_sec > 0:
+                self._supervisors.append(asyncio.create_task(self._supervise(client)))
 
         self._initialized = True
 
+    @property
+    def clients(self) -> list[MCPClient]:
+        return list(self._clients.values())
+
+    async def _supervise(self, client: MCPClient) -> None:
+        """Ping a running server periodically and restart it once it has died."""
+        interval = client.config.health_check_interval_sec
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                if client.status == MCPServerStatus.CONNECTED:
+                    await client.ping()
+                elif (
+                    client.status == MCPServerStatus.ERROR
+                    and client.name not in self._cleanup_tasks
+                    and client.retry_in == 0
+                ):
+                    await client.ensure_connected()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"MCP server {client.name} restart failed: {e}")
+
+    async def _connect(self, client: MCPClient) -> MCPServerStartup:
+        timeout = client.config.startup_timeout_sec
+        start = time.monotonic()
+        error: str | None = None
+
+        task = asyncio.create_task(client.connect())
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+
+        if not done:
+            error = f"timed out after {timeout:g}s"
+        elif task.exception() is not None:
+            error = str(task.exception()) or type(task.exception()).__name__
+
+        elapsed = time.monotonic() - start
+
+        if error is not None:
+            logger.warning(f"MCP server {client.name} failed to start: {error}")
+            # Tearing down a half-started server can take a while; don't make
+            # startup wait for it
+            task.cancel()
+            self._cleanup_tasks[client.name] = asyncio.create_task(
+                self._cleanup_failed(client, task)
+            )
+            client.status = MCPServerStatus.ERROR
+            client.record_failure(error)
+
+        return MCPServerStartup(
+            name=client.name,
+            status=client.status,
+            elapsed=elapsed,
+            tool_count=len(client.tools),
+            error=error,
+        )
+
+    async def _cleanup_failed(self, client: MCPClient, task: asyncio.Task) -> None:
+        try:
+            await asyncio.gather(task, return_exceptions=True)
+            await client.disconnect()
+        except Exception:
+            logger.debug(f"Error cleaning up MCP server {client.name}", exc_info=True)
+
+        client.status = MCPServerStatus.ERROR
+        self._cleanup_tasks.pop(client.name, None)
+
+    async def shutdown(self) -> None:
+        for task in self._supervisors:
+            task.cancel()
+        await asyncio.gather(*self._supervisors, return_exceptions=True)
+        self._supervisors.clear()
+
+        if self._cleanup_tasks:
+            await asyncio.gather(*self._cleanup_tasks.values(), return_exceptions=True)
+            self._cleanup_tasks.clear()
+
+        clients = list(self._clients.values())
+        results = await asyncio.gather(
+            *(client.disconnect() for client in clients),
+            return_exceptions=True,
+        )
+
+        for client, result in zip(clients, results):
+            if isinstance(result, Exception):
+                logger.debug(
+                    f"Error disconnecting MCP server {client.name}", exc_info=result
+                )
+
+        self._clients.clear()
+        self._initialized = False
+
     def register_tools(self, registry: ToolRegistry) -> int:
+        self._registry = registry
         count = 0
 
         for client in self._clients.values():
-            if client.status != MCPServerStatus.CONNECTED:
+            if client.status == MCPServerStatus.ERROR:
                 continue
 
             for tool_info in client.tools:
-                mcp_tool = MCPTool(
-                    tool_info=tool_info,
-                    client=client,
-                    config=self.config,
-                    name=f"{client.name}_{tool_info.name}",
-                )
-                registry.register_mcp_tool(mcp_tool)
+                registry.register_mcp_tool(self._create_tool(client, tool_info))
                 count += 1
 
         return count
+
+    def _create_tool(self, client: MCPClient, tool_info: MCPToolInfo) -> MCPTool:
+        return MCPTool(
+            tool_info=tool_info,
+            client=client,
+            config=self.config,
+            name=f"{client.name}_{tool_info.name}",
+        )
+
+    def _manifest_key(self, client: MCPClient) -> str:
+        return manifest_key(client.config, self.config.cwd)
+
+    def _on_tools_changed(self, client: MCPClient) -> None:
+        self._manifests.save(
+            self._manifest_key(client),
+            client.name,
+            client.server_version,
+            client.tools,
+        )
+
+        if self._registry is None:
+            return
+
+        # The live server differs from the cached manifest; bring the
+        # registered tools in line with it
+        prefix = f"{client.name}_"
+        current = {f"{prefix}{tool.name}" for tool in client.tools}
+        for tool in self._registry.get_tools():
+            if (
+                isinstance(tool, MCPTool)
+                and tool.client is client
+                and tool.name not in current
+            ):
+                self._registry.unregister(tool.name)
+
+        for tool_info in client.tools:
+            self._registry.register_mcp_tool(self._create_tool(client, tool_info))
@@ -18,6 +18,10 @@ class MCPTool(Tool):
         self.name = name
         self.description = self._tool_info.description
 
+    @property
+    def client(self) -> MCPClient:
+        return self._client
+
     @property
     def schema(self) -> dict[str, Any]:
         input_schema = self._tool_info.input_schema or {}
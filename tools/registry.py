@@ -1,4 +1,6 @@
+from __future__ import annotations
 from tools.subagent import SubagentTool
+from tools.subagent import ParallelSubagentTool
 from tools.subagent import get_default_subagent_definitions
 from tools.subagent_loader import discover_subagents
 from config.config import Config
@@ -7,6 +9,7 @@ from tools.base import ToolInvocation
 from tools.base import ToolResult
 from pathlib import Path
 from typing import Any
+from typing import Callable
 import logging
 from tools.base import Tool
 
@@ -19,8 +22,20 @@ class ToolRegistry:
         self._mcp_tools: dict[str, Tool] = {}
         self.config = config
 
-    def register(self, tool: Tool) -> None:
-        if tool.name in self._tools:
+    def view(self, config: Config) -> ToolRegistry:
+        """A registry sharing these tools, filtered by `config.allowed_tools`.
+
+        Tools registered on the view replace the shared ones in the view
+        only. MCP tools stay a shared table, so the view sees MCP tool list
+        changes.
+        """
+        view = ToolRegistry(config)
+        view._tools = dict(self._tools)
+        view._mcp_tools = self._mcp_tools
+        return view
+
+    def register(self, tool: Tool, replace: bool = False) -> None:
+        if tool.name in self._tools and not replace:
             logger.warning(f"Overwriting existing tool: {tool.name}")
 
         self._tools[tool.name] = tool
@@ -39,9 +54,16 @@ class ToolRegistry:
             del self._tools[name]
             return True
 
+        if name in self._mcp_tools:
+            del self._mcp_tools[name]
+            return True
+
         return False
 
     def get(self, name: str) -> Tool | None:
+        if self.config.allowed_tools and name not in self.config.allowed_tools:
+            return None
+
         if name in self._tools:
             return self._tools[name]
         elif name in self._mcp_tools:
@@ -72,6 +94,7 @@ class ToolRegistry:
         name: str,
         params: dict[str, Any],
         cwd: Path,
+        on_progress: Callable[[str], None] | None = None,
     ) -> ToolResult:
         tool = self.get(name)
 
@@ -97,6 +120,7 @@ class ToolRegistry:
         invocation = ToolInvocation(
             params=params,
             cwd=cwd,
+            on_progress=on_progress,
         )
 
         try:
@@ -113,6 +137,13 @@ class ToolRegistry:
 
         return result
 
+    async def close(self) -> None:
+        for tool in [*self._tools.values(), *self._mcp_tools.values()]:
+            try:
+                await tool.close()
+            except Exception:
+                logger.exception(f"Error closing tool {tool.name}")
+
 
 def create_default_registry(config: Config) -> ToolRegistry:
     registry = ToolRegistry(config)
@@ -120,12 +151,16 @@ def create_default_registry(config: Config) -> ToolRegistry:
     for tool_class in get_all_builtin_tools():
         registry.register(tool_class(config))
 
-    for subagent_definition in get_default_subagent_definitions():
-        registry.register(SubagentTool(config, subagent_definition))
+    definitions = {
+        definition.name: definition for definition in get_default_subagent_definitions()
+    }
+    # Discover user-defined subagents (override defaults by name)
+    for definition in discover_subagents(config.cwd):
+        definitions[definition.name] = definition
 
-    # Discover and register user-defined subagents (override defaults by name)
-    user_subagents = discover_subagents(config.cwd)
-    for definition in user_subagents:
+    for definition in definitions.values():
         registry.register(SubagentTool(config, definition))
 
+    registry.register(ParallelSubagentTool(config, definitions))
+
     return registry
@@ -1,13 +1,26 @@
+from __future__ import annotations
 import asyncio
 from pydantic import Field
 from tools.base import ToolInvocation
 from tools.base import ToolResult
 from typing import Any
+from typing import TYPE_CHECKING
 from pydantic import BaseModel
 from dataclasses import dataclass
+from dataclasses import field
+from contextlib import aclosing
+from typing import Callable
+from config.config import BudgetConfig
 from config.config import Config
 from tools.base import Tool
 
+if TYPE_CHECKING:
+    from agent.session import Session
+
+
+# Upper bound on tasks in one `parallel_subagents` call
+MAX_PARALLEL_TASKS = 8
+
 
 class SubagentParams(BaseModel):
     goal: str = Field(
@@ -23,6 +36,9 @@ class SubagentDefinition:
     allowed_tools: list[str] | None = None
     max_turns: int = 20
     timeout_seconds: float = 600
+    # Token budget for one run; the parent session's budget applies too
+    max_prompt_tokens: int | None = None
+    max_completion_tokens: int | None = None
 
     @classmethod
     def from_dict(cls, data: dict) -> "SubagentDefinition":
@@ -39,7 +55,132 @@ class SubagentDefinition:
             allowed_tools=data.get("allowed_tools"),
             max_turns=data.get("max_turns", 20),
             timeout_seconds=data.get("timeout_seconds", 600),
+            max_prompt_tokens=data.get("max_prompt_tokens"),
+            max_completion_tokens=data.get("max_completion_tokens"),
+        )
+
+
+@dataclass
+class SubagentRun:
+    definition: SubagentDefinition
+    goal: str
+    termination: str = "goal"
+    response: str | None = None
+    error: str | None = None
+    tool_calls: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    usage: dict[str, int] | None = None
+
+    def summary(self) -> str:
+        return f"""Sub-agent '{self.definition.name}' completed. 
+        Termination: {self.termination}
+        Tools called: {", ".join(self.tool_calls) if self.tool_calls else "None"}
+
+        Result:
+        {self.response or "No response"}
+        """
+
+
+async def run_subagent(
+    config: Config,
+    definition: SubagentDefinition,
+    goal: str,
+    parent_session: Session | None = None,
+    on_tool_call: Callable[[str], None] | None = None,
+) -> SubagentRun:
+    """Run one subagent to completion in a child of `parent_session`."""
+    from agent.events import AgentEventType
+    from agent.agent import Agent
+
+    overrides: dict[str, Any] = {
+        "max_turns": definition.max_turns,
+        # The wall-clock budget makes the subagent wrap up shortly before
+        # the hard timeout below cancels it
+        "budget": BudgetConfig(
+            max_prompt_tokens=definition.max_prompt_tokens,
+            max_completion_tokens=definition.max_completion_tokens,
+            max_wall_clock_sec=definition.timeout_seconds,
+        ),
+    }
+    if definition.allowed_tools:
+        overrides["allowed_tools"] = definition.allowed_tools
+
+    subagent_config = config.model_copy(update=overrides)
+
+    prompt = f"""You are a specialized sub-agent with a specific task to complete.
+
+        {definition.goal_prompt}
+
+        YOUR TASK:
+        {goal}
+
+        IMPORTANT:
+        - Focus only on completing the specified task
+        - Do not engage in unrelated actionss
+        - Once you have completed the task or have the answer, provide your final response
+        - Be concise and direct in your output
+        """
+
+    run = SubagentRun(definition=definition, goal=goal)
+    # Text of the turn in progress, reported if the subagent is cut off
+    partial: list[str] = []
+
+    async def consume(agent: Agent) -> None:
+        async with aclosing(agent.run(prompt)) as events:
+            async for event in events:
+                if event.type == AgentEventType.TEXT_DELTA:
+                    partial.append(event.data.get("content", ""))
+                elif event.type == AgentEventType.TOOL_CALL_START:
+                    partial.clear()
+                    name = event.data.get("name")
+                    run.tool_calls.append(name)
+                    if on_tool_call is not None:
+                        on_tool_call(name)
+                elif event.type == AgentEventType.TEXT_COMPLETE:
+                    run.response = event.data.get("content")
+                    partial.clear()
+                elif event.type == AgentEventType.AGENT_END:
+                    run.usage = event.data.get("usage")
+                    if run.response is None:
+                        run.response = event.data.get("response")
+                elif event.type == AgentEventType.AGENT_ERROR:
+                    run.termination = "error"
+                    run.error = event.data.get("error", "Unknown error")
+                    run.response = f"Sub-agent failed: {run.error}"
+                    return
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    try:
+        session = (
+            parent_session.create_child(subagent_config) if parent_session else None
         )
+        async with Agent(subagent_config, session=session) as agent:
+            # Cancelling on timeout unwinds the LLM stream and any running
+            # tool (killing its processes, closing its connections)
+            await asyncio.wait_for(
+                consume(agent),
+                timeout=definition.timeout_seconds,
+            )
+
+    except asyncio.TimeoutError:
+        run.termination = "timeout"
+        response = f"Sub-agent timed out after {definition.timeout_seconds:g}s."
+        in_progress = "".join(partial).strip()
+        if in_progress:
+            response += f" Partial response:\n{in_progress}"
+        elif run.response:
+            response += f" Last response:\n{run.response}"
+        run.response = response
+
+    except Exception as e:
+        run.termination = "error"
+        run.error = str(e)
+        run.response = f"Sub-agent failed: {e}"
+
+    run.elapsed = loop.time() - start
+    return run
 
 
 class SubagentTool(Tool):
@@ -50,6 +191,14 @@ class SubagentTool(Tool):
     ):
         super().__init__(config)
         self.definition = definition
+        # Session this tool is registered in; subagents run as its children
+        self.parent_session: Session | None = None
+
+    def for_session(self, session: Session) -> SubagentTool:
+        """Copy of this tool running subagents as children of `session`."""
+        tool = SubagentTool(session.config, self.definition)
+        tool.parent_session = session
+        return tool
 
     @property
     def name(self) -> str:
@@ -65,82 +214,152 @@ class SubagentTool(Tool):
         return True
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        from agent.events import AgentEventType
-        from agent.agent import Agent
-
         params = SubagentParams(**invocation.params)
         if not params.goal:
             return ToolResult.error_result("No goal specified for subagent")
 
-        config_dict = self.config.to_dict()
+        def on_tool_call(name: str) -> None:
+            if invocation.on_progress is not None:
+                invocation.on_progress(f"→ {name}\n")
 
-        config_dict["max_turns"] = self.definition.max_turns
+        run = await run_subagent(
+            self.config,
+            self.definition,
+            params.goal,
+            parent_session=self.parent_session,
+            on_tool_call=on_tool_call,
+        )
 
-        if self.definition.allowed_tools:
-            config_dict["allowed_tools"] = self.definition.allowed_tools
+        metadata = {
+            "termination": run.termination,
+            "elapsed": run.elapsed,
+            "usage": run.usage,
+        }
 
-        subagent_config = Config(**config_dict)
+        if run.error:
+            return ToolResult.error_result(run.summary(), metadata=metadata)
 
-        prompt = f"""You are a specialized sub-agent with a specific task to complete.
+        return ToolResult.success_result(run.summary(), metadata=metadata)
 
-        {self.definition.goal_prompt}
 
-        YOUR TASK:
-        {params.goal}
+class SubagentTask(BaseModel):
+    subagent: str = Field(
+        ...,
+        description="Sub-agent to run, without the `subagent_` prefix (e.g. `codebase_investigator`)",
+    )
+    goal: str = Field(..., description="The specific task for this sub-agent")
 
-        IMPORTANT:
-        - Focus only on completing the specified task
-        - Do not engage in unrelated actionss
-        - Once you have completed the task or have the answer, provide your final response
-        - Be concise and direct in your output
-        """
 
-        tool_calls = []
-        final_response = None
-        error = None
-        terminate_response = "goal"
+class ParallelSubagentParams(BaseModel):
+    tasks: list[SubagentTask] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_PARALLEL_TASKS,
+        description="Independent tasks, one sub-agent each",
+    )
 
-        try:
-            async with Agent(subagent_config) as agent:
-                deadline = (
-                    asyncio.get_event_loop().time() + self.definition.timeout_seconds
-                )
-                async for event in agent.run(prompt):
-                    if asyncio.get_event_loop().time() > deadline:
-                        terminate_response = "timeout"
-                        final_response = "Sub-agent timed out"
-                        break
-
-                    if event.type == AgentEventType.TOOL_CALL_START:
-                        tool_calls.append(event.data.get("name"))
-                    elif event.type == AgentEventType.TEXT_COMPLETE:
-                        final_response = event.data.get("content")
-                    elif event.type == AgentEventType.AGENT_END:
-                        if final_response is None:
-                            final_response = event.data.get("response")
-                    elif event.type == AgentEventType.AGENT_ERROR:
-                        terminate_response = "error"
-                        error = event.data.get("error", "Unknown error")
-                        final_response = f"Sub-agent failed: {error}"
-                        break
-
-        except Exception as e:
-            terminate_response = "error"
-            error = str(e)
-            final_response = f"Sub-agent failed: {e}"
-
-        result = f"""Sub-agent '{self.definition.name}' completed. 
-        Termination: {terminate_response}
-        Tools called: {", ".join(tool_calls) if tool_calls else "None"}
 
-        Result:
-        {final_response or "No response"}
-        """
+class ParallelSubagentTool(Tool):
+    name = "parallel_subagents"
+    description = (
+        "Run several sub-agents concurrently, one per task, and return all their "
+        "results together. Use for independent investigations (e.g. exploring "
+        "different parts of the codebase) instead of calling sub-agents one by one."
+    )
+    schema = ParallelSubagentParams
+
+    def __init__(
+        self,
+        config: Config,
+        definitions: dict[str, SubagentDefinition],
+    ):
+        super().__init__(config)
+        self.definitions = definitions
+        self.parent_session: Session | None = None
 
-        if error:
-            return ToolResult.error_result(result)
+    def for_session(self, session: Session) -> ParallelSubagentTool:
+        """Copy of this tool running subagents as children of `session`."""
+        tool = ParallelSubagentTool(session.config, self.definitions)
+        tool.parent_session = session
+        return tool
 
-        return ToolResult.success_result(result)
+    def is_mutating(self, params: dict[str, Any]) -> bool:
+        return True
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = ParallelSubagentParams(**invocation.params)
+
+        unknown = sorted(
+            {
+                task.subagent
+                for task in params.tasks
+                if _definition_name(task.subagent) not in self.definitions
+            }
+        )
+        if unknown:
+            return ToolResult.error_result(
+                f"Unknown sub-agent(s): {', '.join(unknown)}. "
+                f"Available: {', '.join(sorted(self.definitions))}"
+            )
+
+        total = len(params.tasks)
+        slots = asyncio.Semaphore(self.config.max_parallel_subagents)
+
+        def progress(message: str) -> None:
+            if invocation.on_progress is not None:
+                invocation.on_progress(message + "\n")
+
+        async def run_task(index: int, task: SubagentTask) -> SubagentRun:
+            definition = self.definitions[_definition_name(task.subagent)]
+            label = f"[{index}/{total} {definition.name}]"
+
+            async with slots:
+                progress(f"{label} started")
+                run = await run_subagent(
+                    self.config,
+                    definition,
+                    task.goal,
+                    parent_session=self.parent_session,
+                    on_tool_call=lambda name: progress(f"{label} → {name}"),
+                )
+                progress(f"{label} {run.termination} after {run.elapsed:.1f}s")
+                return run
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        runs = await asyncio.gather(
+            *(run_task(i, task) for i, task in enumerate(params.tasks, start=1))
+        )
+        elapsed = loop.time() - start
+
+        failed = sum(1 for run in runs if run.error)
+        sections = [
+            f"Ran {total} sub-agents in {elapsed:.1f}s "
+            f"({total - failed} completed, {failed} failed)"
+        ]
+        for index, run in enumerate(runs, start=1):
+            sections.append(
+                f"## [{index}] {run.definition.name}: {run.goal}\n"
+                f"Termination: {run.termination} ({run.elapsed:.1f}s)\n"
+                f"Tools called: {', '.join(run.tool_calls) if run.tool_calls else 'None'}\n\n"
+                f"{run.response or 'No response'}"
+            )
+
+        output = "\n\n".join(sections)
+        metadata = {
+            "subagents": total,
+            "failed": failed,
+            "elapsed": elapsed,
+        }
+
+        if failed == total:
+            return ToolResult.error_result(output, metadata=metadata)
+
+        return ToolResult.success_result(output, metadata=metadata)
+
+
+def _definition_name(name: str) -> str:
+    return name.removeprefix("subagent_")
 
 
 CODEBASE_INVESTIGATOR = SubagentDefinition(
@@ -4,6 +4,8 @@ Discovers and loads user-defined subagent definitions from TOML files.
 Scan order (project-level overrides global):
   1. Global: ~/.config/ite/subagents/*.toml
   2. Project: .ite/subagents/*.toml
+
+Parsed files are cached per process until they change (tools/discovery_cache.py).
 """
 
 import logging
@@ -13,6 +15,7 @@ import tomli
 
 from config.loader import get_config_dir
 from tools.subagent import SubagentDefinition
+from tools.discovery_cache import get_discovery_cache
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +42,9 @@ def _scan_directory(directory: Path) -> dict[str, SubagentDefinition]:
         return results
 
     for toml_file in sorted(directory.glob("*.toml")):
-        definition = load_subagent_from_toml(toml_file)
+        definition = get_discovery_cache().get_or_load(
+            "subagent", toml_file, load_subagent_from_toml
+        )
         if definition:
             results[definition.name] = definition
             logger.debug(f"Loaded subagent '{definition.name}' from {toml_file}")
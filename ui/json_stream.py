@@ -0,0 +1,34 @@
+"""
+Newline-delimited JSON output for headless runs (`--output json`).
+
+Every `AgentEvent` becomes one line `{"type": ..., "ts": ..., "data": {...}}`
+on stdout, flushed immediately, so another process can follow the agent
+live. Nothing else is written to stdout in this mode.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Any
+from typing import TextIO
+from agent.events import AgentEvent
+
+
+class JsonEventWriter:
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream or sys.stdout
+
+    def event(self, event: AgentEvent) -> None:
+        self.record(event.type.value, event.data)
+
+    def record(self, type: str, data: dict[str, Any] | None = None) -> None:
+        """Write a non-agent record, e.g. `session_start` or a CLI error."""
+        line = json.dumps(
+            {"type": type, "ts": time.time(), "data": data or {}},
+            ensure_ascii=False,
+            default=str,
+        )
+        self.stream.write(line + "\n")
+        self.stream.flush()
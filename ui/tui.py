@@ -71,7 +71,11 @@ class TUI:
         self._max_block_tokens = 2500
         # Spinner state
         self._spinner_live: Live | None = None
+        self._spinner: Spinner | None = None
+        self._spinner_message = ""
         self._spinner_running = False
+        # Unfinished last line of live tool output
+        self._progress_line = ""
 
     def start_spinner(self, message: str = "Thinking") -> None:
         """Show an animated spinner with a message."""
@@ -79,6 +83,9 @@ class TUI:
             return
         self.console.print()
         spinner = Spinner("dots", text=Text(f" {message}...", style="muted"))
+        self._spinner = spinner
+        self._spinner_message = message
+        self._progress_line = ""
         self._spinner_live = Live(
             spinner,
             console=self.console,
@@ -93,8 +100,34 @@ class TUI:
         if self._spinner_live and self._spinner_running:
             self._spinner_live.stop()
         self._spinner_live = None
+        self._spinner = None
         self._spinner_running = False
 
+    def tool_call_progress(self, call_id: str, content: str) -> None:
+        """Show the latest line of a running tool's output next to the spinner."""
+        if not self._spinner_running or self._spinner is None:
+            return
+
+        text = self._progress_line + content
+        lines = text.replace("\r", "\n").split("\n")
+        self._progress_line = lines[-1][-500:]
+
+        latest = next((line for line in reversed(lines) if line.strip()), "")
+        if not latest:
+            return
+
+        width = max(self.console.width - len(self._spinner_message) - 10, 20)
+        latest = latest.strip()
+        if len(latest) > width:
+            latest = latest[: width - 1] + "…"
+
+        self._spinner.update(
+            text=Text.assemble(
+                (f" {self._spinner_message}... ", "muted"),
+                (latest, "dim"),
+            )
+        )
+
     def begin_assistant(self) -> None:
         self._assistant_buffer = ""
         self._streamed_line_count = 0
@@ -144,9 +177,11 @@ class TUI:
             "read_file": ["path", "offset", "limit"],
             "write_file": ["path", "create_directories", "content"],
             "edit": ["path", "replace_all", "old_string", "new_string"],
-            "shell": ["command", "timeout", "cwd"],
+            "multi_edit": ["path", "edits"],
+            "shell": ["command", "timeout", "cwd", "persistent", "shell_id"],
+            "shell_job": ["action", "job_id", "command", "cwd", "timeout"],
             "list_dir": ["path", "include_hidden"],
-            "grep": ["path", "case_insensitive", "pattern"],
+            "grep": ["path", "output_mode", "case_insensitive", "context", "pattern"],
             "glob": ["path", "pattern"],
             "web_search": ["query", "max_results"],
             "todos": ["action", "task", "due_date"],
@@ -180,6 +215,14 @@ class TUI:
                     byte_count = len(value.encode("utf-8", errors="replace"))
                     value = f" <-- {line_count} lines | {byte_count} bytes -->"
 
+            if key == "edits" and isinstance(value, list):
+                edit_paths = {e.get("path") for e in value if isinstance(e, dict)}
+                edit_paths.discard(None)
+                value = f" <-- {len(value)} edits"
+                if edit_paths:
+                    value += f" | {len(edit_paths)} files"
+                value += " -->"
+
             if isinstance(value, bool):
                 value = str(value)
             elif not isinstance(value, str):
@@ -214,9 +257,11 @@ class TUI:
                 display_args[key] = str(display_path_relative_to_cwd(val, self.cwd))
 
         panel = Panel(
-            self._render_args_table(name, display_args)
-            if display_args
-            else Text("(no args)", style="muted"),
+            (
+                self._render_args_table(name, display_args)
+                if display_args
+                else Text("(no args)", style="muted")
+            ),
             title=title,
             title_align="left",
             subtitle=Text("running...", style="muted"),
@@ -377,6 +422,104 @@ class TUI:
         )
         self.console.print()
 
+    def print_mcp_startup(self, report: list[Any]) -> None:
+        """Show how each MCP server's startup went."""
+        if not report:
+            return
+
+        table = Table.grid(padding=(0, 2))
+        table.add_column(no_wrap=True)
+        table.add_column(style="code", no_wrap=True)
+        table.add_column(style="muted", justify="right", no_wrap=True)
+        table.add_column(overflow="fold")
+
+        for server in report:
+            ok = server.error is None
+            if not ok:
+                detail = Text(server.error or "failed", style="error")
+            elif server.cached:
+                detail = Text(
+                    f"{server.tool_count} tools (cached, starts on first use)",
+                    style="muted",
+                )
+            else:
+                detail = Text(f"{server.tool_count} tools", style="muted")
+
+            table.add_row(
+                Text("✓" if ok else "✗", style="success" if ok else "error"),
+                server.name,
+                "-" if server.cached else f"{server.elapsed * 1000:.0f}ms",
+                detail,
+            )
+
+        self.console.print(Text("MCP servers", style="muted"))
+        self.console.print(table)
+
+    def print_mcp_status(self, clients: list[Any]) -> None:
+        """Show each MCP server's health and per-tool call latency."""
+        if not clients:
+            self.console.print(Text("No MCP servers configured", style="muted"))
+            return
+
+        for client in clients:
+            status = client.status.value
+            style = {"connected": "success", "error": "error"}.get(status, "muted")
+            header = Text.assemble(
+                (client.name, "code"),
+                "  ",
+                (status, style),
+            )
+            if client.restarts:
+                header.append(f"  restarts: {client.restarts}", style="muted")
+            if client.status.value == "error" and client.last_error:
+                header.append(f"  {client.last_error}", style="error")
+                if client.retry_in > 0:
+                    header.append(f" (retry in {client.retry_in:.0f}s)", style="muted")
+            self.console.print(header)
+
+            if not client.metrics:
+                self.console.print(Text("  no calls yet", style="muted"))
+                continue
+
+            table = Table(box=None, padding=(0, 2), show_edge=False)
+            table.add_column("tool", style="code", no_wrap=True)
+            table.add_column("calls", justify="right")
+            table.add_column("errors", justify="right")
+            table.add_column("avg", justify="right", style="muted")
+            table.add_column("max", justify="right", style="muted")
+
+            for tool_name, stats in sorted(client.metrics.items()):
+                table.add_row(
+                    tool_name,
+                    str(stats.calls),
+                    str(stats.errors),
+                    f"{stats.average_latency * 1000:.0f}ms",
+                    f"{stats.max_latency * 1000:.0f}ms",
+                )
+
+            self.console.print(table)
+
+    def print_sessions(self, sessions: list[dict[str, Any]]) -> None:
+        """List saved sessions, most recently updated first."""
+        if not sessions:
+            self.console.print(Text("No saved sessions", style="muted"))
+            return
+
+        table = Table(box=None, padding=(0, 2), show_edge=False)
+        table.add_column("id", style="code", no_wrap=True)
+        table.add_column("updated", style="muted")
+        table.add_column("cwd")
+
+        for session in sessions:
+            table.add_row(
+                session.get("session_id", "?")[:8],
+                session.get("updated_at", ""),
+                session.get("cwd", ""),
+            )
+
+        self.console.print(table)
+        self.console.print(Text("Continue one with --resume <id>", style="muted"))
+
     def tool_call_complete(
         self,
         call_id: str,
@@ -456,7 +599,7 @@ class TUI:
                     )
                 )
 
-        elif name in {"write_file", "edit"} and success and diff:
+        elif name in {"write_file", "edit", "multi_edit"} and success and diff:
             output_line = output.strip() if output.strip() else "Completed"
             blocks.append(Text(output_line, style="muted"))
             diff_text = diff
@@ -509,10 +652,15 @@ class TUI:
 
         elif name == "grep" and success:
             matches = metadata.get("matches")
+            files_matched = metadata.get("files_matched")
             files_searched = metadata.get("files_searched")
+            output_mode = metadata.get("output_mode")
             summary = []
 
-            if isinstance(matches, int):
+            if output_mode == "files_with_matches" and isinstance(files_matched, int):
+                file_word = "file" if files_matched == 1 else "files"
+                summary.append(f"{files_matched} {file_word} matched")
+            elif isinstance(matches, int):
                 if matches == 1:
                     summary.append("1 match was found")
                 else:
@@ -0,0 +1,433 @@
+"""
+Unified diff generation that stays fast on large files.
+
+Two strategies are used:
+  1. When the caller knows where the edits happened (EditTool), only the
+     lines around those edits are compared.
+  2. Otherwise the common prefix/suffix is trimmed and the middle is
+     diffed with patience anchoring, falling back to difflib only on
+     small unanchored gaps.
+
+Output matches difflib.unified_diff's format.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+from collections import Counter
+from dataclasses import dataclass
+
+# difflib's SequenceMatcher is roughly quadratic; above this many
+# line pairs an unanchored gap is reported as a single replace block.
+MAX_MATCHER_PAIRS = 4_000_000
+
+
+@dataclass
+class TextEdit:
+    """A replaced character range: old[old_start:old_end] -> new[new_start:new_end]."""
+
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+
+# (old_start, old_end, new_start, new_end) line ranges that differ
+ChangeBlock = tuple[int, int, int, int]
+
+
+def split_lines(text: str) -> list[str]:
+    """Split on newlines only, always ending every line with a newline."""
+    if not text:
+        return []
+
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    return [line + "\n" for line in lines]
+
+
+def unified_diff(
+    old: str,
+    new: str,
+    fromfile: str,
+    tofile: str,
+    context: int = 3,
+    edits: list[TextEdit] | None = None,
+) -> str:
+    located = _blocks_from_edits(old, new, edits, context) if edits else None
+
+    if located is not None:
+        old_lines, new_lines, blocks = located
+    else:
+        old_lines = split_lines(old)
+        new_lines = split_lines(new)
+        blocks = diff_blocks(old_lines, new_lines)
+
+    if not blocks:
+        return ""
+
+    output = [f"--- {fromfile}\n", f"+++ {tofile}\n"]
+
+    for group in _group_blocks(blocks, context):
+        output.extend(_format_hunk(old_lines, new_lines, group, context))
+
+    return "".join(output)
+
+
+def compose_edits(first: list[TextEdit], second: list[TextEdit]) -> list[TextEdit]:
+    """Combine edits A->B and B->C into (possibly coarser) edits A->C."""
+    if not first:
+        return list(second)
+    if not second:
+        return list(first)
+
+    intervals = [(e.old_start, e.old_end) for e in first]
+    for e in second:
+        intervals.append(
+            (
+                _new_to_old(first, e.old_start, start=True),
+                _new_to_old(first, e.old_end, start=False),
+            )
+        )
+
+    intervals.sort()
+    merged: list[list[int]] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    composed: list[TextEdit] = []
+    for start, end in merged:
+        composed.append(
+            TextEdit(
+                old_start=start,
+                old_end=end,
+                new_start=_old_to_new(second, _old_to_new(first, start)),
+                new_end=_old_to_new(second, _old_to_new(first, end)),
+            )
+        )
+
+    return composed
+
+
+def _old_to_new(edits: list[TextEdit], pos: int) -> int:
+    # pos is never strictly inside an edit's old range here
+    delta = 0
+    for e in edits:
+        if e.old_end <= pos:
+            delta = e.new_end - e.old_end
+        else:
+            break
+
+    return pos + delta
+
+
+def _new_to_old(edits: list[TextEdit], pos: int, start: bool) -> int:
+    delta = 0
+    for e in edits:
+        if e.new_start <= pos <= e.new_end:
+            # Touches this edit; widen to cover it entirely
+            return e.old_start if start else e.old_end
+        if e.new_end < pos:
+            delta = e.old_end - e.new_end
+        else:
+            break
+
+    return pos + delta
+
+
+def _blocks_from_edits(
+    old: str,
+    new: str,
+    edits: list[TextEdit],
+    context: int,
+) -> tuple[_SparseLines, _SparseLines, list[ChangeBlock]] | None:
+    old_lines = _SparseLines(old)
+    new_lines = _SparseLines(new)
+
+    # Each region: [old_first, old_last, new_first, new_last] as line numbers,
+    # then the matching character offsets of those line boundaries.
+    regions: list[list[int]] = []
+
+    for edit in sorted(edits, key=lambda e: e.old_start):
+        # Widen the edit to whole lines. The line holding old_end is joined
+        # to the replacement, and the rest of it is unchanged text that maps
+        # 1:1 into the new content.
+        newline = old.find("\n", edit.old_end)
+        old_end = newline + 1 if newline != -1 else len(old)
+        new_end = edit.new_end + (old_end - edit.old_end)
+        old_start = old.rfind("\n", 0, edit.old_start) + 1
+        new_start = new.rfind("\n", 0, edit.new_start) + 1
+
+        region = [
+            old_lines.line_at(old_start),
+            old_lines.line_at(old_end),
+            new_lines.line_at(new_start),
+            new_lines.line_at(new_end),
+            old_start,
+            old_end,
+            new_start,
+            new_end,
+        ]
+
+        if regions and region[0] <= regions[-1][1]:
+            last = regions[-1]
+            for i in (1, 3, 5, 7):
+                last[i] = max(last[i], region[i])
+        else:
+            regions.append(region)
+
+    blocks: list[ChangeBlock] = []
+    prev_old_end = prev_new_end = 0
+
+    for old_first, old_last, new_first, new_last, *offsets in regions:
+        if old_first - prev_old_end != new_first - prev_new_end:
+            # Edit hints don't line up with the content; let the caller
+            # fall back to a full diff rather than emit a wrong one.
+            return None
+
+        old_lines.load(old_first, offsets[0], offsets[1], context)
+        new_lines.load(new_first, offsets[2], offsets[3], context)
+
+        blocks.extend(
+            _matcher_blocks(
+                old_lines, new_lines, old_first, old_last, new_first, new_last
+            )
+        )
+        prev_old_end, prev_new_end = old_last, new_last
+
+    if len(old_lines) - prev_old_end != len(new_lines) - prev_new_end:
+        return None
+
+    return old_lines, new_lines, blocks
+
+
+class _SparseLines:
+    """Line-indexed view of a text that only splits the parts that are loaded.
+
+    Supports len() and slicing over loaded lines, which is all the hunk
+    formatting needs.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._lines: dict[int, str] = {}
+        self._total = text.count("\n")
+        if text and not text.endswith("\n"):
+            self._total += 1
+
+        # Incremental newline counting for line_at()
+        self._offset = 0
+        self._line = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, key: slice) -> list[str]:
+        return [self._lines[i] for i in range(*key.indices(self._total))]
+
+    def line_at(self, offset: int) -> int:
+        """Line number of a line-start offset (len(text) maps to the line count)."""
+        if offset >= len(self._text):
+            return self._total
+
+        if offset < self._offset:
+            self._line -= self._text.count("\n", offset, self._offset)
+        else:
+            self._line += self._text.count("\n", self._offset, offset)
+        self._offset = offset
+        return self._line
+
+    def load(self, first_line: int, start: int, end: int, context: int) -> None:
+        text = self._text
+
+        for _ in range(context):
+            if start == 0:
+                break
+            start = text.rfind("\n", 0, start - 1) + 1
+            first_line -= 1
+
+        for _ in range(context):
+            if end >= len(text):
+                break
+            newline = text.find("\n", end)
+            end = newline + 1 if newline != -1 else len(text)
+
+        for i, line in enumerate(split_lines(text[start:end]), start=first_line):
+            self._lines[i] = line
+
+
+def diff_blocks(a: list[str], b: list[str]) -> list[ChangeBlock]:
+    """Return the differing line ranges between a and b."""
+    blocks: list[ChangeBlock] = []
+    _patience(a, b, 0, len(a), 0, len(b), blocks)
+    return blocks
+
+
+def _patience(
+    a: list[str],
+    b: list[str],
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+    blocks: list[ChangeBlock],
+) -> None:
+    # Trim common prefix and suffix; for typical edits this leaves very little
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+
+    if alo == ahi and blo == bhi:
+        return
+
+    if alo == ahi or blo == bhi:
+        blocks.append((alo, ahi, blo, bhi))
+        return
+
+    anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+
+    if not anchors:
+        blocks.extend(_matcher_blocks(a, b, alo, ahi, blo, bhi))
+        return
+
+    prev_a, prev_b = alo, blo
+    for ai, bi in anchors:
+        if ai != prev_a or bi != prev_b:
+            _patience(a, b, prev_a, ai, prev_b, bi, blocks)
+        prev_a, prev_b = ai + 1, bi + 1
+
+    _patience(a, b, prev_a, ahi, prev_b, bhi, blocks)
+
+
+def _unique_anchors(
+    a: list[str],
+    b: list[str],
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+) -> list[tuple[int, int]]:
+    """Lines unique in both ranges, reduced to their longest increasing run."""
+    a_slice = a[alo:ahi]
+    b_slice = b[blo:bhi]
+    a_counts = Counter(a_slice)
+    b_counts = Counter(b_slice)
+    b_index = {line: j for j, line in enumerate(b_slice, blo)}
+
+    pairs = [
+        (i, b_index[line])
+        for i, line in enumerate(a_slice, alo)
+        if a_counts[line] == 1 and b_counts.get(line) == 1
+    ]
+
+    return _longest_increasing(pairs)
+
+
+def _longest_increasing(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    b_indexes = [bj for _, bj in pairs]
+    if b_indexes == sorted(b_indexes):
+        # Common case: nothing moved, every anchor is usable
+        return pairs
+
+    # Patience sorting on the b index
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous: list[int] = [-1] * len(pairs)
+
+    for k, (_, bj) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, bj)
+        if pos > 0:
+            previous[k] = tail_index[pos - 1]
+        if pos == len(tails):
+            tails.append(bj)
+            tail_index.append(k)
+        else:
+            tails[pos] = bj
+            tail_index[pos] = k
+
+    result: list[tuple[int, int]] = []
+    k = tail_index[-1] if tail_index else -1
+    while k != -1:
+        result.append(pairs[k])
+        k = previous[k]
+
+    result.reverse()
+    return result
+
+
+def _matcher_blocks(
+    a: list[str] | _SparseLines,
+    b: list[str] | _SparseLines,
+    alo: int,
+    ahi: int,
+    blo: int,
+    bhi: int,
+) -> list[ChangeBlock]:
+    if (ahi - alo) * (bhi - blo) > MAX_MATCHER_PAIRS:
+        return [(alo, ahi, blo, bhi)]
+
+    matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+    return [
+        (alo + i1, alo + i2, blo + j1, blo + j2)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def _group_blocks(blocks: list[ChangeBlock], context: int) -> list[list[ChangeBlock]]:
+    groups: list[list[ChangeBlock]] = []
+
+    for block in blocks:
+        if groups and block[0] - groups[-1][-1][1] <= 2 * context:
+            groups[-1].append(block)
+        else:
+            groups.append([block])
+
+    return groups
+
+
+def _format_range(start: int, stop: int) -> str:
+    # Same conventions as difflib's unified diff headers
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _format_hunk(
+    a: list[str] | _SparseLines,
+    b: list[str] | _SparseLines,
+    group: list[ChangeBlock],
+    context: int,
+) -> list[str]:
+    first, last = group[0], group[-1]
+    a_start = max(0, first[0] - context)
+    b_start = max(0, first[2] - context)
+    a_end = min(len(a), last[1] + context)
+    b_end = min(len(b), last[3] + context)
+
+    lines = [
+        f"@@ -{_format_range(a_start, a_end)} +{_format_range(b_start, b_end)} @@\n"
+    ]
+
+    a_pos = a_start
+    for i1, i2, j1, j2 in group:
+        lines.extend(" " + line for line in a[a_pos:i1])
+        lines.extend("-" + line for line in a[i1:i2])
+        lines.extend("+" + line for line in b[j1:j2])
+        a_pos = i2
+
+    lines.extend(" " + line for line in a[a_pos:a_end])
+    return lines
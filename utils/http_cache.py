@@ -0,0 +1,194 @@
+"""
+Small on-disk HTTP cache for fetched pages.
+
+Entries are JSON files named by a hash of the URL. Freshness follows the
+usual rules: `Cache-Control: max-age` first, then `Expires`, then a
+heuristic based on `Last-Modified`. Stale entries with an `ETag` or
+`Last-Modified` are revalidated with a conditional request, so an
+unchanged page costs a 304 instead of a full download.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping
+from utils.paths import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# Only these response headers matter for serving and revalidating entries
+_STORED_HEADERS = (
+    "cache-control",
+    "content-type",
+    "date",
+    "etag",
+    "expires",
+    "last-modified",
+)
+
+# Upper bound for heuristic freshness of pages without explicit lifetimes
+MAX_HEURISTIC_FRESHNESS = 24 * 60 * 60
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    text: str
+    headers: dict[str, str] = field(default_factory=dict)
+    stored_at: float = field(default_factory=time.time)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "")
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        directives = _parse_cache_control(self.headers.get("cache-control", ""))
+
+        if "no-cache" in directives:
+            return False
+
+        return now - self.stored_at < self.freshness_lifetime()
+
+    def validator_headers(self) -> dict[str, str]:
+        """Headers for a conditional request revalidating this entry."""
+        headers: dict[str, str] = {}
+
+        if etag := self.headers.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = last_modified
+
+        return headers
+
+    def freshness_lifetime(self) -> float:
+        directives = _parse_cache_control(self.headers.get("cache-control", ""))
+        max_age = directives.get("max-age")
+        if max_age is not None:
+            try:
+                return float(max_age)
+            except ValueError:
+                return 0
+
+        expires = _parse_http_date(self.headers.get("expires"))
+        if expires is not None:
+            date = _parse_http_date(self.headers.get("date")) or self.stored_at
+            return expires - date
+
+        last_modified = _parse_http_date(self.headers.get("last-modified"))
+        if last_modified is not None:
+            # RFC 9111 heuristic: 10% of the time since the last change
+            age = self.stored_at - last_modified
+            return min(max(age, 0) * 0.1, MAX_HEURISTIC_FRESHNESS)
+
+        return 0
+
+
+class HttpCache:
+    MAX_ENTRIES = 512
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def get(self, url: str) -> CachedResponse | None:
+        path = self._entry_path(url)
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            entry = CachedResponse(**data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError):
+            path.unlink(missing_ok=True)
+            return None
+
+        return entry if entry.url == url else None
+
+    def store(
+        self,
+        url: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        text: str,
+    ) -> CachedResponse | None:
+        """Cache a response if its headers allow it; returns the stored entry."""
+        kept = {name: headers[name] for name in _STORED_HEADERS if headers.get(name)}
+        directives = _parse_cache_control(kept.get("cache-control", ""))
+
+        if status_code != 200 or "no-store" in directives or "private" in directives:
+            return None
+
+        entry = CachedResponse(
+            url=url,
+            status_code=status_code,
+            text=text,
+            headers=kept,
+        )
+
+        if not entry.validator_headers() and entry.freshness_lifetime() <= 0:
+            # Could never be served or revalidated
+            return None
+
+        self._write(entry)
+        return entry
+
+    def refresh(self, entry: CachedResponse, headers: Mapping[str, str]) -> None:
+        """Update an entry after a 304 Not Modified response."""
+        for name in _STORED_HEADERS:
+            if name != "content-type" and headers.get(name):
+                entry.headers[name] = headers[name]
+
+        entry.stored_at = time.time()
+        self._write(entry)
+
+    def _write(self, entry: CachedResponse) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self._entry_path(entry.url), json.dumps(asdict(entry)))
+            self._prune()
+        except OSError:
+            logger.debug(f"Failed to write HTTP cache entry for {entry.url}")
+
+    def _prune(self) -> None:
+        entries = list(self.directory.glob("*.json"))
+        overflow = len(entries) - self.MAX_ENTRIES
+        if overflow <= 0:
+            return
+
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[:overflow]:
+            path.unlink(missing_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json"
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+
+    return directives
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
@@ -1,3 +1,7 @@
+import os
+import shutil
+import stat
+import tempfile
 from pathlib import Path
 
 
@@ -26,6 +30,7 @@ def display_path_relative_to_cwd(
 
     return str(p)
 
+
 def ensure_parent_dir(path: str | Path) -> Path:
     path = Path(path)
 
@@ -41,3 +46,65 @@ def is_binary_file(path: str | Path) -> bool:
             return b"\x00" in chunk
     except (OSError, TypeError):
         return False
+
+
+def _write_temp_file(path: Path, content: str, encoding: str) -> Path:
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+    )
+    tmp_path = Path(tmp_name)
+
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if path.exists():
+            os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return tmp_path
+
+
+def atomic_write_text(
+    path: str | Path,
+    content: str,
+    encoding: str = "utf-8",
+) -> None:
+    """Write a file via a temp file + rename so readers never see partial content."""
+    atomic_write_many({Path(path): content}, encoding=encoding)
+
+
+def atomic_write_many(
+    contents: dict[Path, str],
+    encoding: str = "utf-8",
+) -> None:
+    """Write several files, staging all of them before any rename.
+
+    If staging any file fails, nothing is replaced. A symlink is written
+    through to its target, like a plain write; a file with other hard links
+    gets the staged content copied into it, so the links keep sharing it.
+    """
+    staged: list[tuple[Path, Path]] = []
+
+    try:
+        for path, content in contents.items():
+            # Stage next to the link target so the rename replaces the target
+            path = Path(path).resolve()
+            staged.append((path, _write_temp_file(path, content, encoding)))
+    except BaseException:
+        for _, tmp_path in staged:
+            tmp_path.unlink(missing_ok=True)
+        raise
+
+    for path, tmp_path in staged:
+        if path.exists() and path.stat().st_nlink > 1:
+            shutil.copyfile(tmp_path, path)
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, path)
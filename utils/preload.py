@@ -0,0 +1,53 @@
+"""
+Background warm-up of dependencies that are slow to load.
+
+The openai SDK takes a few hundred milliseconds to import and the tokenizer
+has to read (or download) its BPE ranks on first use. Neither is needed
+until the first LLM request, so both are loaded on a daemon thread while the
+main thread starts MCP servers, discovers tools and waits for input. If the
+main thread gets there first it simply does the work itself (imports and
+`get_tokenizer` are safe to race).
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+from utils.text import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+_started: set[str] = set()
+_lock = threading.Lock()
+
+
+def preload_in_background(model_name: str) -> None:
+    """Start warming up the LLM client and tokenizer for `model_name`; a
+    no-op if that has already been started in this process."""
+    with _lock:
+        if model_name in _started:
+            return
+        _started.add(model_name)
+
+    thread = threading.Thread(
+        target=_preload,
+        args=(model_name,),
+        name="ite-preload",
+        daemon=True,
+    )
+    thread.start()
+
+
+def _preload(model_name: str) -> None:
+    try:
+        importlib.import_module("openai")
+    except Exception:
+        logger.debug("Preloading openai failed", exc_info=True)
+
+    try:
+        get_tokenizer(model_name)
+    except Exception:
+        # e.g. offline without a cached encoding; the first count_tokens
+        # call will try again
+        logger.debug("Preloading the tokenizer failed", exc_info=True)
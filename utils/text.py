@@ -1,6 +1,8 @@
+from functools import lru_cache
 import tiktoken
 
 
+@lru_cache(maxsize=None)
 def get_tokenizer(model: str):
     try:
         encoding = tiktoken.get_encoding_for_model(model)